@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""Run the pygameui benchmarks headlessly and report the results as JSON.
+
+    pygameui-benchmark.py --output before.json
+    ... change things ...
+    pygameui-benchmark.py --output after.json --compare before.json
+
+"""
+
+import argparse
+import json
+import sys
+import os
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import pygameui as ui
+from pygameui import benchmark
+
+
+def main():
+    names = [bench.name for bench in benchmark.BENCHMARKS]
+
+    parser = argparse.ArgumentParser(description='Benchmark pygameui.')
+    parser.add_argument('--frames', type=int, default=300,
+                        help='frames to run per benchmark')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply the number of views by this')
+    parser.add_argument('--only', action='append', choices=names,
+                        help='run just this benchmark (repeatable)')
+    parser.add_argument('--flat', action='store_true',
+                        help='use the flat compositor')
+    parser.add_argument('--output', help='write the JSON results here')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='compare with the results of an earlier run')
+    args = parser.parse_args()
+
+    ui.init('pygameui - Benchmark', benchmark.WINDOW_SIZE, headless=True)
+    if args.flat:
+        ui.compositor.use(ui.compositor.FLAT)
+
+    results = benchmark.run_all(args.frames, args.scale, args.only)
+    text = json.dumps(results, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print text
+
+    if args.compare:
+        with open(args.compare) as f:
+            print >> sys.stderr, benchmark.compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
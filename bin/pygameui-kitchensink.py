@@ -203,6 +203,7 @@ class KitchenSinkScene(ui.Scene):
             self.progress_view.hidden = False
         self.progress_view.progress = 0
         self.running_task = True
+        ui.animation.start(self)
 
     def update(self, dt):
         ui.Scene.update(self, dt)
@@ -212,6 +213,7 @@ class KitchenSinkScene(ui.Scene):
             self.running_task = (self.progress_view.progress < 1.0)
             self.task_button.enabled = not self.running_task
             if self.task_button.enabled:
+                ui.animation.stop(self)
                 ui.show_alert("I'M FINISHED!", title='Milkshake')
                 self.progress_view.progress = 0
                 self.progress_view.hidden = True
@@ -20,6 +20,26 @@ Altering a view's frame requires that you call 'relayout' which will resize the
 view's backing surface and give each child view a chance to reposition and/or
 resize itself in response.
 
+Views are retained. A view is only redrawn when it was marked as needing
+display (see 'View.set_needs_display') or when a child moved, was shown or
+hidden, or was itself redrawn. Only the changed areas of the window are
+updated each frame. The 'compositor' module can instead draw views straight
+into the window from a flat display list.
+
+When nothing is animating, the run loop sleeps until the next input event.
+Views that change over time without input tell the loop to keep ticking
+with the 'animation' module.
+
+For benchmarks, thumbnails and regression checks on machines without a
+display, initialize with 'init(headless=True)' and advance frames with
+'step' instead of calling 'run'; 'step' uses a synthetic clock and
+returns the rendered frame. The 'recording' module records the input of
+a session and replays it through the same dispatch code.
+
+The time each frame spends in its phases (event dispatch, update, draw,
+blit, flip) is recorded by the 'frametimer' module; a PerfHUDView shows it
+on screen.
+
 Events on views can trigger response code that you control. For instance, when
 a button is clicked, your code can be called back. The click is a "signal" and
 your code is a "slot". The view classes define various signals to which you
@@ -36,12 +56,15 @@ LICENSE = 'MIT'
 __version__ = '0.2.0'
 
 
+import os
+
 import pygame
 
 from alert import *
 from button import *
 from callback import *
 from checkbox import *
+from console import *
 from dialog import *
 from flipbook import *
 from grid import *
@@ -50,6 +73,7 @@ from imageview import *
 from label import *
 from listview import *
 from notification import *
+from perfhud import *
 from progress import *
 from render import *
 from resource import *
@@ -57,9 +81,22 @@ from scroll import *
 from select import *
 from slider import *
 from spinner import *
+from texteditor import *
 from textfield import *
+from textview import *
 from view import *
 
+import animation
+import compositor
+import frametimer
+import glyphs
+import piecetable
+import recording
+import surfaces
+import textcache
+import textmetrics
+import tiles
+import viewprofiler
 import focus
 import window
 import scene
@@ -75,9 +112,25 @@ logger = logging.getLogger(__name__)
 Rect = pygame.Rect
 window_surface = None
 
+# Posted by a timer to wake the run loop from an idle wait.
+try:
+    WAKE_EVENT = pygame.event.custom_type()
+except AttributeError:
+    WAKE_EVENT = pygame.NUMEVENTS - 1
+
+_down_in_view = None
+
 
-def init(name='', window_size=(640, 480)):
+def init(name='', window_size=(640, 480), headless=False):
+    """Initialize pygame and open the window.
+
+    With `headless`, nothing is shown: the SDL dummy video driver is used
+    and views are drawn into an offscreen window surface. Use `step` to
+    advance and render frames without a display.
+    """
     logger.debug('init %s %s' % (__name__, __version__))
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
     pygame.init()
     logger.debug('pygame %s' % pygame.__version__)
     pygame.key.set_repeat(200, 50)
@@ -92,64 +145,132 @@ def run():
     assert len(scene.stack) > 0
 
     clock = pygame.time.Clock()
-    down_in_view = None
 
     elapsed = 0
 
     while True:
+        timeout = animation.next_timeout()
+        events = _next_events(timeout)
+
         dt = clock.tick(60)
+        if timeout is None:
+            # Nothing was animating while the loop slept until this
+            # input, so the time slept must not make animations jump.
+            dt = min(dt, 1000 // 60)
 
         elapsed += dt
         if elapsed > 5000:
             elapsed = 0
             logger.debug('%d FPS', clock.get_fps())
 
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit()
-                import sys
-                sys.exit()
-
-            mousepoint = pygame.mouse.get_pos()
-
-            if e.type == pygame.MOUSEBUTTONDOWN:
-                hit_view = scene.current.hit(mousepoint)
-                logger.debug('hit %s' % hit_view)
-                if (hit_view is not None and
-                    not isinstance(hit_view, scene.Scene)):
-                    focus.set(hit_view)
-                    down_in_view = hit_view
-                    pt = hit_view.from_window(mousepoint)
-                    hit_view.mouse_down(e.button, pt)
-                else:
-                    focus.set(None)
-            elif e.type == pygame.MOUSEBUTTONUP:
-                hit_view = scene.current.hit(mousepoint)
-                if hit_view is not None:
-                    if down_in_view and hit_view != down_in_view:
-                        down_in_view.blurred()
-                        focus.set(None)
-                    pt = hit_view.from_window(mousepoint)
-                    hit_view.mouse_up(e.button, pt)
-                down_in_view = None
-            elif e.type == pygame.MOUSEMOTION:
-                if down_in_view and down_in_view.draggable:
-                    pt = down_in_view.from_window(mousepoint)
-                    down_in_view.mouse_drag(pt, e.rel)
-                else:
-                    scene.current.mouse_motion(mousepoint)
-            elif e.type == pygame.KEYDOWN:
-                if focus.view:
-                    focus.view.key_down(e.key, e.unicode)
-                else:
-                    scene.current.key_down(e.key, e.unicode)
-            elif e.type == pygame.KEYUP:
-                if focus.view:
-                    focus.view.key_up(e.key)
-                else:
-                    scene.current.key_up(e.key)
-
-        scene.current.update(dt / 1000.0)
-        scene.current.draw()
-        window_surface.blit(scene.current.surface, (0, 0))
-        pygame.display.flip()
+        if not _frame(events, dt / 1000.0):
+            pygame.quit()
+            import sys
+            sys.exit()
+
+
+def step(frames=1, dt=1 / 60.0, events=()):
+    """Advance the current scene `frames` frames of `dt` seconds each.
+
+    Unlike `run`, this returns right away and does not depend on the wall
+    clock, so the same calls render the same frames. `events` are
+    dispatched in the first frame, followed by any events in pygame's
+    queue. Returns the window surface holding the last frame, or None if
+    a QUIT event was dispatched.
+    """
+    assert len(scene.stack) > 0
+
+    for i in range(frames):
+        frame_events = list(events) if i == 0 else []
+        frame_events.extend(pygame.event.get())
+        if not _frame(frame_events, dt):
+            return None
+    return window_surface
+
+
+def _frame(events, dt):
+    """Dispatch `events`, update by `dt` seconds and draw the scene.
+
+    Returns False when a QUIT event is seen.
+    """
+    frametimer.begin_frame()
+    recording.capture(events, dt)
+
+    for e in events:
+        if e.type == pygame.QUIT:
+            return False
+        dispatch(e)
+    frametimer.lap(frametimer.EVENTS)
+
+    scene.current.update(dt)
+    frametimer.lap(frametimer.UPDATE)
+
+    damage = compositor.compose(scene.current, window_surface)
+    if damage:
+        pygame.display.update(damage)
+    frametimer.lap(frametimer.FLIP)
+    frametimer.end_frame()
+    return True
+
+
+def dispatch(e):
+    """Deliver an input event to the views of the current scene."""
+    global _down_in_view
+
+    if e.type == pygame.MOUSEBUTTONDOWN:
+        mousepoint = e.pos
+        hit_view = scene.current.hit(mousepoint)
+        logger.debug('hit %s' % hit_view)
+        if (hit_view is not None and
+            not isinstance(hit_view, scene.Scene)):
+            focus.set(hit_view)
+            _down_in_view = hit_view
+            pt = hit_view.from_window(mousepoint)
+            hit_view.mouse_down(e.button, pt)
+        else:
+            focus.set(None)
+    elif e.type == pygame.MOUSEBUTTONUP:
+        mousepoint = e.pos
+        hit_view = scene.current.hit(mousepoint)
+        if hit_view is not None:
+            if _down_in_view and hit_view != _down_in_view:
+                _down_in_view.blurred()
+                focus.set(None)
+            pt = hit_view.from_window(mousepoint)
+            hit_view.mouse_up(e.button, pt)
+        _down_in_view = None
+    elif e.type == pygame.MOUSEMOTION:
+        mousepoint = e.pos
+        if _down_in_view and _down_in_view.draggable:
+            pt = _down_in_view.from_window(mousepoint)
+            _down_in_view.mouse_drag(pt, e.rel)
+        else:
+            scene.current.mouse_motion(mousepoint)
+    elif e.type == pygame.KEYDOWN:
+        window.key_mods = getattr(e, 'mod', 0)
+        if focus.view:
+            focus.view.key_down(e.key, e.unicode)
+        else:
+            scene.current.key_down(e.key, e.unicode)
+    elif e.type == pygame.KEYUP:
+        window.key_mods = getattr(e, 'mod', 0)
+        if focus.view:
+            focus.view.key_up(e.key)
+        else:
+            scene.current.key_up(e.key)
+
+
+def _next_events(timeout):
+    """Get pending events, sleeping up to `timeout` ms for one to arrive.
+
+    A timeout of None sleeps until the next input event; 0 does not sleep.
+    """
+    if timeout == 0:
+        return pygame.event.get()
+
+    if timeout is not None:
+        pygame.time.set_timer(WAKE_EVENT, timeout)
+    event = pygame.event.wait()
+    if timeout is not None:
+        pygame.time.set_timer(WAKE_EVENT, 0)
+    return [event] + pygame.event.get()
@@ -50,8 +50,8 @@ class AlertView(dialog.DialogView):
                                         max(self.message_label.margin[1],
                                             self.title_label.margin[1]))
         self.message_label.frame.w = self.frame.w - self.padding[0] * 2
-        self.message_label.render()
         self.message_label.shrink_wrap()
+        self.message_label.layout()
         self.message_label.frame.centerx = self.frame.w // 2
 
         assert self.ok.margin[1] == self.cancel.margin[1]
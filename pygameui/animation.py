@@ -0,0 +1,64 @@
+"""Track what needs the run loop to keep ticking.
+
+When nothing is animating the run loop sleeps until the next input event
+instead of updating and drawing 60 times a second. Views that change on
+their own register interest here:
+
+- while a view animates continuously (e.g. slides across the window) it
+  calls `start` and later `stop`;
+- a view that only changes at a known time (e.g. a blinking cursor or an
+  auto-closing notification) calls `wake_after` with the delay.
+
+"""
+
+import weakref
+
+import pygame
+
+
+animators = weakref.WeakSet()
+wakeups = weakref.WeakKeyDictionary()
+
+
+def start(obj):
+    """Keep the run loop ticking every frame until `stop(obj)`."""
+    animators.add(obj)
+
+
+def stop(obj):
+    animators.discard(obj)
+    wakeups.pop(obj, None)
+
+
+def wake_after(obj, seconds):
+    """Have the run loop tick no later than `seconds` from now.
+
+    A later request by the same `obj` replaces its earlier one.
+    """
+    wakeups[obj] = pygame.time.get_ticks() + int(seconds * 1000)
+
+
+def is_active():
+    return len(animators) > 0
+
+
+def next_timeout():
+    """Milliseconds the run loop may sleep for.
+
+    0 means the loop should tick right away; None means it may sleep
+    until the next input event.
+    """
+    if len(animators) > 0:
+        return 0
+
+    if len(wakeups) == 0:
+        return None
+
+    now = pygame.time.get_ticks()
+    wake_at = min(wakeups.itervalues())
+    if wake_at <= now:
+        for obj, ticks in wakeups.items():
+            if ticks <= now:
+                del wakeups[obj]
+        return 0
+    return wake_at - now
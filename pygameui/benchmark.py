@@ -0,0 +1,287 @@
+"""Benchmarks of synthetic scenes.
+
+Each benchmark builds a scene of many views of one kind, then steps it
+headlessly with a synthetic clock, changing something every frame so
+that views are really redrawn. The frames rarely lay anything out, so
+stylizing and laying out the whole scene is timed separately, over
+RESTYLES passes. The results are plain dicts, so runs can
+be saved as JSON and compared across versions; see
+bin/pygameui-benchmark.py.
+
+    import pygameui as ui
+    from pygameui import benchmark
+
+    ui.init(window_size=benchmark.WINDOW_SIZE, headless=True)
+    print benchmark.run_all(frames=300)
+
+Times are in milliseconds and memory in bytes, except `max_rss`, which is
+in the platform's unit of getrusage (kilobytes on Linux).
+
+"""
+
+from __future__ import absolute_import
+
+import gc
+import platform
+import timeit
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+import pygame
+
+import pygameui as ui
+from pygameui import compositor
+from pygameui import frametimer
+from pygameui import render
+from pygameui import scene
+from pygameui import surfaces
+from pygameui import theme
+
+
+WINDOW_SIZE = (800, 600)
+
+# Times the whole scene is stylized and laid out again after the frames.
+RESTYLES = 10
+
+_clock = timeit.default_timer
+
+
+class Benchmark(object):
+    """A scene to build and a change to make to it every frame."""
+
+    def __init__(self, name, build, tick, count):
+        self.name = name
+        self.build = build
+        self.tick = tick
+        self.count = count
+
+
+def _grid_frames(count, size):
+    """`count` frames of `size` tiled over the window."""
+    w, h = size
+    columns = max(1, WINDOW_SIZE[0] // w)
+    return [ui.Rect((i % columns) * w, (i // columns) * h % WINDOW_SIZE[1],
+                    w, h) for i in range(count)]
+
+
+def build_labels(count):
+    a_scene = ui.Scene()
+    for i, frame in enumerate(_grid_frames(count, (100, 24))):
+        a_scene.add_child(ui.Label(frame, 'Label %d' % i))
+    return a_scene
+
+
+def tick_labels(a_scene, frame):
+    child = a_scene.children[frame % len(a_scene.children)]
+    child.text = 'Frame %d' % frame
+
+
+def build_buttons(count):
+    a_scene = ui.Scene()
+    for i, frame in enumerate(_grid_frames(count, (100, 28))):
+        a_scene.add_child(ui.Button(frame, 'Button %d' % i))
+    return a_scene
+
+
+def tick_buttons(a_scene, frame):
+    # Focus a button, as hovering or pressing would.
+    child = a_scene.children[frame % len(a_scene.children)]
+    ui.focus.set(child)
+
+
+def build_nested(depth):
+    a_scene = ui.Scene()
+    parent = a_scene
+    frame = ui.Rect(0, 0, WINDOW_SIZE[0], WINDOW_SIZE[1])
+    for i in range(depth):
+        frame = frame.inflate(-4, -4)
+        frame.topleft = (2, 2)
+        child = ui.View(ui.Rect(frame))
+        parent.add_child(child)
+        parent = child
+    parent.add_child(ui.Label(ui.Rect(0, 0, 100, 24), 'Deepest'))
+    return a_scene
+
+
+def tick_nested(a_scene, frame):
+    deepest = a_scene
+    while len(deepest.children) > 0:
+        deepest = deepest.children[0]
+    deepest.text = 'Frame %d' % frame
+
+
+def build_long_list(count):
+    a_scene = ui.Scene()
+    labels = [ui.Label(ui.Rect(0, 0, 200, theme.current.label_height),
+                       'Item %d' % i, halign=ui.LEFT) for i in range(count)]
+    list_view = ui.ListView(ui.Rect(0, 0, 200, 100), labels)
+    a_scene.add_child(ui.ScrollView(ui.Rect(20, 20, 200, 400), list_view))
+    return a_scene
+
+
+def tick_long_list(a_scene, frame):
+    # Scroll down a few pixels per frame and start over at the end.
+    scroll_view = a_scene.children[0]
+    content_h = scroll_view.content_view.frame.h
+    offset = (frame * 3) % max(1, content_h - scroll_view.frame.h)
+    scroll_view.set_content_offset(0, offset / float(content_h))
+
+
+def build_gradients(count):
+    a_scene = ui.Scene()
+    for frame in _grid_frames(count, (80, 80)):
+        a_scene.add_child(ui.View(frame))
+    return a_scene
+
+
+def tick_gradients(a_scene, frame):
+    child = a_scene.children[frame % len(a_scene.children)]
+    value = frame * 37 % 256
+    child.background_color = ((value, 255 - value, 128), (255, 255, 255))
+    child.set_needs_display()
+
+
+def build_dialogs(count):
+    a_scene = ui.Scene()
+    for i in range(count):
+        dialog = ui.DialogView(ui.Rect(20 + i * 30, 20 + i * 20, 240, 160))
+        dialog.add_child(ui.Label(ui.Rect(0, 0, 240, 40), 'Dialog %d' % i))
+        a_scene.add_child(dialog)
+    return a_scene
+
+
+def tick_dialogs(a_scene, frame):
+    # Drag the top dialog back and forth.
+    dialog = a_scene.children[-1]
+    dialog.frame.left = 20 + abs(frame % 200 - 100)
+
+
+BENCHMARKS = [
+    Benchmark('labels', build_labels, tick_labels, 400),
+    Benchmark('buttons', build_buttons, tick_buttons, 200),
+    Benchmark('nested', build_nested, tick_nested, 60),
+    Benchmark('long_list', build_long_list, tick_long_list, 2000),
+    Benchmark('gradients', build_gradients, tick_gradients, 60),
+    Benchmark('dialogs', build_dialogs, tick_dialogs, 8),
+]
+
+
+def run(benchmark, frames=300, scale=1.0):
+    """Run one benchmark and return its results as a dict."""
+    count = max(1, int(benchmark.count * scale))
+    surfaces.clear()
+    render.clear_gradient_cache()
+    gc.collect()
+
+    start = _clock()
+    a_scene = benchmark.build(count)
+    build_ms = (_clock() - start) * 1000
+
+    start = _clock()
+    scene.push(a_scene)     # stylizes and lays out the scene
+    push_ms = (_clock() - start) * 1000
+
+    ui.step(1)      # draw everything once
+    frametimer.reset()
+
+    start = _clock()
+    for frame in range(frames):
+        benchmark.tick(a_scene, frame)
+        ui.step(1)
+    elapsed = _clock() - start
+    frame_ms = frametimer.percentiles()
+    draw_ms = frametimer.percentiles(frametimer.DRAW)
+
+    restyle_times = []
+    for i in range(RESTYLES):
+        start = _clock()
+        a_scene.stylize()
+        restyle_times.append((_clock() - start) * 1000)
+        ui.step(1)
+
+    start = _clock()
+    theme.use_theme(theme.current)
+    ui.step(1)
+    theme_switch_ms = (_clock() - start) * 1000
+
+    result = dict(name=benchmark.name,
+                  count=count,
+                  frames=frames,
+                  fps=frames / elapsed if elapsed > 0 else None,
+                  frame_ms=frame_ms,
+                  draw_ms=draw_ms,
+                  build_ms=build_ms,
+                  push_ms=push_ms,
+                  stylize_ms=frametimer.percentiles_of(restyle_times),
+                  theme_switch_ms=theme_switch_ms,
+                  view_count=1 + len(list(a_scene.iter_descendants())),
+                  surface_bytes=_surface_bytes(a_scene),
+                  max_rss=_max_rss())
+    scene.pop()
+    ui.focus.set(None)
+    return result
+
+
+def run_all(frames=300, scale=1.0, names=None):
+    """Run the benchmarks (all, or those in `names`).
+
+    Returns a dict with the results and a description of the environment.
+    """
+    results = [run(benchmark, frames, scale) for benchmark in BENCHMARKS
+               if names is None or benchmark.name in names]
+    return dict(pygameui=ui.__version__,
+                pygame=pygame.version.ver,
+                python=platform.python_version(),
+                platform=platform.platform(),
+                compositor=('flat' if compositor.mode == compositor.FLAT
+                            else 'retained'),
+                scale=scale,
+                results=results)
+
+
+def _surface_bytes(root):
+    """Bytes of the backing surfaces of the views under `root`."""
+    total = 0
+    for a_view in [root] + list(root.iter_descendants()):
+        if a_view.surface is not None:
+            total += surfaces.surface_bytes(a_view.surface)
+    return total
+
+
+def _max_rss():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def compare(old, new):
+    """A text table comparing two results of `run_all`.
+
+    Ratios above 1 mean `new` is faster (for fps) or takes less time.
+    """
+    old_results = dict((result['name'], result) for result in old['results'])
+    lines = ['%-12s %10s %10s %8s %12s %12s %8s' % (
+        'benchmark', 'old fps', 'new fps', 'ratio',
+        'old p95 ms', 'new p95 ms', 'ratio')]
+    for result in new['results']:
+        before = old_results.get(result['name'])
+        if before is None:
+            continue
+        old_fps, new_fps = before['fps'], result['fps']
+        old_p95 = before['frame_ms'].get('p95', 0)
+        new_p95 = result['frame_ms'].get('p95', 0)
+        lines.append('%-12s %10s %10s %8.2f %12.2f %12.2f %8.2f' % (
+            result['name'], _format_fps(old_fps), _format_fps(new_fps),
+            new_fps / old_fps if old_fps and new_fps is not None else 0,
+            old_p95, new_p95, old_p95 / new_p95 if new_p95 else 0))
+    return '\n'.join(lines)
+
+
+def _format_fps(fps):
+    # A run too short to time has no fps.
+    if fps is None:
+        return '-'
+    return '%.1f' % fps
@@ -23,10 +23,10 @@ class Button(label.Label):
         self.on_clicked = callback.Signal()
 
     def layout(self):
-        label.Label.layout(self)
         if self.frame.w == 0:
-            self.frame.w = self.text_size[0] + self.padding[0] * 2
-            label.Label.layout(self)
+            text_w = self.measure()[1][0]
+            self.frame.w = text_w + self.padding[0] * 2
+        label.Label.layout(self)
 
     def mouse_up(self, button, point):
         focus.set(None)
@@ -2,7 +2,8 @@
 
 * a 3-tuple is RGB
 * a 4-tuple is RGBA
-* a pair of tuples signifies a linear gradient
+* a pair of tuples signifies a linear gradient; more than two tuples
+  signify a linear gradient through evenly spaced colors
 
 """
 
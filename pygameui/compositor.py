@@ -0,0 +1,253 @@
+"""Put the current scene on the window.
+
+There are two compositors:
+
+RETAINED
+
+    Each view draws into its own surface, parents blit their children's
+    surfaces into theirs and the scene's surface is copied to the
+    window. Only changed areas are redrawn (see View.refresh). This is
+    the default.
+
+FLAT
+
+    The view tree is walked once per frame into a flat display list of
+    drawing operations in window coordinates. Views are drawn straight
+    into the window, so each pixel is not copied once per level of the
+    tree. A view is still drawn into its own surface and blitted (it is
+    "isolated") when it is only partly visible within its parent, when
+    it draws over its children (see View.draws_over_children), or when
+    it cannot draw in place (e.g. ImageView). Each damaged area is
+    drawn separately, so two small changes far apart do not repaint
+    everything between them.
+
+Use `use` to pick one.
+
+"""
+
+import pygame
+
+import frametimer
+import theme
+import view
+
+
+RETAINED = 0
+FLAT = 1
+
+mode = RETAINED
+
+# Above this many damaged rectangles per frame, their union is presented.
+MAX_DAMAGE_RECTS = 32
+
+# Damaged rectangles are merged when the area of their union is at most
+# this many times the sum of their areas.
+MERGE_SLACK = 1.25
+
+# Display list operations.
+DRAW = 0      # draw a view (without its children) at rect
+BLIT = 1      # blit a surface at rect.topleft
+BORDER = 2    # draw a view's border around rect
+
+
+def use(new_mode):
+    """Make RETAINED or FLAT the current compositor."""
+    global mode
+    mode = new_mode
+    import scene
+    if scene.current is not None:
+        _invalidate_all(scene.current)
+
+
+def compose(root, target):
+    """Draw what changed in the `root` view onto the `target` surface.
+
+    Returns the list of changed rects of `target`, which is empty when
+    nothing changed.
+    """
+    if mode == FLAT:
+        return _compose_flat(root, target)
+    return _compose_retained(root, target)
+
+
+def _compose_retained(root, target):
+    damage = root.refresh()
+    frametimer.lap(frametimer.DRAW)
+    if not damage:
+        return []
+
+    bounds = target.get_rect()
+    topleft = root.frame.topleft
+    rects = merge_rects([rect.move(topleft).clip(bounds)
+                         for rect in damage])
+
+    for rect in rects:
+        target.blit(root.surface, rect.topleft,
+                    rect.move(-topleft[0], -topleft[1]))
+    frametimer.lap(frametimer.BLIT)
+    return rects
+
+
+def _compose_flat(root, target):
+    bounds = target.get_rect()
+    items, damage = build_display_list(root, bounds)
+    if not damage:
+        frametimer.lap(frametimer.DRAW)
+        return []
+
+    rects = merge_rects([rect.clip(bounds) for rect in damage])
+    for area in rects:
+        render_display_list(items, target, area)
+    # Views are drawn straight into the window; there is no separate blit.
+    frametimer.lap(frametimer.DRAW)
+    return rects
+
+
+def merge_rects(rects):
+    """Merge overlapping or nearby rects, dropping empty ones.
+
+    Two rects are merged when their union is not much larger than the
+    two of them (see MERGE_SLACK), so far apart areas stay separate.
+    Above MAX_DAMAGE_RECTS rects, their union is returned.
+    """
+    merged = []
+    for rect in rects:
+        if rect.w <= 0 or rect.h <= 0:
+            continue
+        index = 0
+        while index < len(merged):
+            other = merged[index]
+            union = rect.union(other)
+            if (union.w * union.h <=
+                (rect.w * rect.h + other.w * other.h) * MERGE_SLACK):
+                # The union may now reach rects already passed over.
+                del merged[index]
+                rect = union
+                index = 0
+            else:
+                index += 1
+        merged.append(rect)
+    if len(merged) > MAX_DAMAGE_RECTS:
+        merged = [merged[0].unionall(merged[1:])]
+    return merged
+
+
+def build_display_list(root, clip):
+    """Walk the view tree rooted at `root` into a flat display list.
+
+    Returns (items, damage). Each item is a tuple (op, obj, rect, clip)
+    in window coordinates; `clip` is the area the item may draw in.
+    `damage` lists the window rects that changed since the last call.
+    """
+    items, damage = [], []
+    rect = pygame.Rect(root.frame)
+    if _isolated(root, rect, clip):
+        _add_isolated(root, rect, clip, items, damage)
+    else:
+        _add_flat(root, rect, items, damage)
+    return items, damage
+
+
+def render_display_list(items, target, area):
+    """Execute display list items, limited to `area` of `target`."""
+    for op, obj, rect, clip in items:
+        clip = clip.clip(area)
+        if clip.w == 0 or clip.h == 0:
+            continue
+
+        if op == DRAW:
+            clip = clip.clip(rect)
+            if clip.w == 0 or clip.h == 0:
+                continue
+            subsurface = target.subsurface(rect)
+            subsurface.set_clip(clip.move(-rect.left, -rect.top))
+            surface = obj.surface
+            obj.surface = subsurface
+            obj._drawing_flat = True
+            try:
+                obj.draw()
+            finally:
+                obj.surface = surface
+                obj._drawing_flat = False
+        elif op == BLIT:
+            target.set_clip(clip)
+            target.blit(obj, rect.topleft)
+        elif op == BORDER:
+            target.set_clip(clip)
+            obj.draw_border(target, rect)
+
+    target.set_clip(None)
+
+
+def _isolated(a_view, rect, clip):
+    if (not a_view.flattenable or a_view.viewport is not None or
+        not clip.contains(rect)):
+        return True
+    if len(a_view.children) == 0:
+        return False
+    # Views that draw after their children would draw over them.
+    draws_over = a_view.draws_over_children
+    if draws_over is None:
+        draw = type(a_view).draw.__func__
+        draw = getattr(draw, '__wrapped__', draw)    # see viewprofiler
+        draws_over = draw is not _view_draw
+    return draws_over
+
+
+_view_draw = view.View.draw.__func__
+
+
+def _add_isolated(a_view, rect, clip, items, damage):
+    if a_view._flat:
+        # Its surface was not kept up to date while it was drawn flat.
+        _invalidate_all(a_view)
+        a_view._flat = False
+    damage.extend(r.move(rect.topleft) for r in a_view.refresh())
+    items.append((BLIT, a_view.surface,
+                  rect.move(a_view.surface_origin()), clip))
+
+
+def _add_flat(a_view, rect, items, damage):
+    if a_view._dirty or not a_view._flat:
+        damage.append(rect)
+        a_view._dirty = False
+        a_view._flat = True
+    damage.extend(r.move(rect.topleft) for r in a_view._damage)
+    a_view._damage = []
+
+    items.append((DRAW, a_view, rect, rect))
+
+    for child in a_view.children:
+        if child.hidden:
+            if not child._drawn_hidden:
+                damage.append(child._drawn_rect.move(rect.topleft))
+                child._drawn_hidden = True
+            continue
+
+        composited = child._composited_rect()
+        if child._drawn_hidden or composited != child._drawn_rect:
+            if not child._drawn_hidden:
+                damage.append(child._drawn_rect.move(rect.topleft))
+            damage.append(composited.move(rect.topleft))
+        child._drawn_rect = composited
+        child._drawn_hidden = False
+
+        child_rect = child.frame.move(rect.topleft)
+
+        if child.shadowed:
+            shadow_size = theme.current.shadow_size
+            shadow_rect = child_rect.move(-(shadow_size // 2),
+                                          -(shadow_size // 2))
+            items.append((BLIT, child.shadow_image, shadow_rect, rect))
+
+        if _isolated(child, child_rect, rect):
+            _add_isolated(child, child_rect, rect, items, damage)
+        else:
+            _add_flat(child, child_rect, items, damage)
+
+        items.append((BORDER, child, child_rect, rect))
+
+
+def _invalidate_all(root):
+    for a_view in [root] + list(root.iter_descendants()):
+        a_view.set_needs_display()
@@ -0,0 +1,169 @@
+import collections
+
+import pygame
+
+import animation
+import scroll
+import textview
+
+
+class ConsoleView(textview.TextView):
+    """An append-only log of lines of text, e.g. application logs.
+
+    At most `capacity` lines (as appended, before wrapping) are kept;
+    appending more drops the oldest ones. Only appended lines are
+    wrapped, and like a TextView, only the lines in view are rendered.
+
+        console = ConsoleView(pygame.Rect(0, 0, 400, 0))
+        scene.add_child(ScrollView(pygame.Rect(0, 0, 400, 200), console))
+        console.append('Connected.')
+
+    The view grows as lines are appended, once per frame however many
+    lines were appended in it. In a ScrollView that is scrolled to the
+    bottom, the newest lines are kept in view.
+
+    Attributes:
+
+        auto_scroll
+
+            Keep the newest lines in view when the view is in a
+            ScrollView that is scrolled to the bottom. Default: True.
+
+    """
+
+    def __init__(self, frame, capacity=1000):
+        textview.TextView.__init__(self, frame)
+        self.capacity = capacity
+        self.auto_scroll = True
+        self._entries = collections.deque()     # lines as appended
+        self._line_counts = collections.deque()     # wrapped lines per entry
+        self._lines = collections.deque()       # wrapped lines
+        self._first_line = 0    # number of wrapped lines dropped so far
+        self._grown_first_line = 0
+        self._grown_line_count = 0
+        self._appended = False
+
+    @property
+    def text(self):
+        return '\n'.join(self._entries)
+
+    @text.setter
+    def text(self, text):
+        self.clear()
+        if text:
+            self.append(text)
+
+    @property
+    def line_count(self):
+        return len(self._lines)
+
+    def line(self, index):
+        return self._lines[index]
+
+    def append(self, text):
+        """Add `text` at the end, as one line per newline in it."""
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        for entry in text.split('\n'):
+            if len(self._entries) >= self.capacity:
+                self._drop_oldest()
+            self._entries.append(entry)
+            if self._wrapped_key is not None:
+                self._add_lines(entry)
+        self._changed()
+
+    def clear(self):
+        self._first_line += len(self._lines)
+        self._entries.clear()
+        self._line_counts.clear()
+        self._lines.clear()
+        self._line_surfaces.clear()
+        self._changed()
+
+    def _changed(self):
+        self._appended = True
+        # Have the run loop tick to show the lines.
+        animation.wake_after(self, 0)
+
+    def _drop_oldest(self):
+        self._entries.popleft()
+        if self._wrapped_key is None:
+            return
+        for _ in range(self._line_counts.popleft()):
+            self._lines.popleft()
+            self._line_surfaces.pop(self._first_line, None)
+            self._first_line += 1
+
+    def _add_lines(self, entry):
+        width = self._wrapped_key[2]
+        lines = [entry[start:end].strip()
+                 for start, end in self._line_spans(entry, width)]
+        self._lines.extend(lines)
+        self._line_counts.append(len(lines))
+
+    def _line_key(self, index):
+        # Lines are cached by their number since the first line ever
+        # appended, which does not change when older lines are dropped.
+        return self._first_line + index
+
+    def _wrap(self):
+        key = (self.font, self.text_color,
+               self.frame.w - self.padding[0] * 2)
+        if key == self._wrapped_key:
+            return
+        self._wrapped_key = key
+        self._line_surfaces.clear()
+        self._lines.clear()
+        self._line_counts.clear()
+        for entry in self._entries:
+            self._add_lines(entry)
+
+    def update(self, dt):
+        textview.TextView.update(self, dt)
+        if self._appended:
+            self._appended = False
+            self._grow()
+
+    def _grow(self):
+        scroll_view = self.parent
+        if (self._wrapped_key is None or self.viewport is None or
+            not isinstance(scroll_view, scroll.ScrollView)):
+            if self._wrapped_key is not None:
+                self.layout()
+            return
+
+        follow = self.auto_scroll and scroll_view.is_scrolled_to_bottom()
+        line_height = self.line_height
+        dropped = self._first_line - self._grown_first_line
+        kept = max(0, self._grown_line_count - dropped)
+        self._grown_first_line = self._first_line
+        self._grown_line_count = self.line_count
+        old_top = -self.frame.top
+        self.frame.h = self.line_count * line_height + self.padding[1] * 2
+
+        if dropped > 0 and kept > 0:
+            # The lines kept moved up by as many rows as were dropped.
+            self._shift_lines_up(dropped * line_height)
+        # Only the rows of the new lines need drawing.
+        top = self.padding[1] + kept * line_height
+        self.set_needs_display((0, top, self.frame.w, self.frame.h - top))
+
+        if follow:
+            scroll_view.scroll_to_bottom()
+        else:
+            scroll_view.scroll_to(old_top)
+
+    def _shift_lines_up(self, dy):
+        """Move what is drawn up by `dy` instead of drawing it again."""
+        visible = self._visible_rect()
+        if self.surface is None or self._dirty or dy >= visible.h:
+            self.set_needs_display()
+            return
+        self.surface.scroll(0, -dy)
+        self._damage = [rect.move(0, -dy) for rect in self._damage]
+        self._damage.append(pygame.Rect(visible.left, visible.bottom - dy,
+                                        visible.w, dy))
+        if visible.top < self.padding[1]:
+            # Lines moved into the top padding.
+            self._damage.append(pygame.Rect(visible.left, visible.top,
+                                            visible.w, self.padding[1]))
+        self._shifted = True
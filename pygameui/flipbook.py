@@ -1,6 +1,7 @@
 import pygame
 
 import view
+import animation
 
 
 class FlipbookView(view.View):
@@ -42,6 +43,8 @@ class FlipbookView(view.View):
         if self.elapsed > self.delay:
             self.current_frame = (self.current_frame + 1) % self.frame_count
             self.elapsed = 0
+            self.set_needs_display()
+        animation.wake_after(self, self.delay - self.elapsed)
 
     def draw(self):
         if not view.View.draw(self):
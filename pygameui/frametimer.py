@@ -0,0 +1,125 @@
+"""Per-phase timing of recent frames.
+
+The run loop times each phase of every frame:
+
+    EVENTS      dispatching input events to views
+    UPDATE      Scene.update
+    DRAW        redrawing views that changed
+    BLIT        copying changed areas onto the window
+    FLIP        pygame.display.update
+
+Timings of the last `history` frames are kept in a ring buffer, so a slow
+frame can be traced to the phase it went to:
+
+    >>> frametimer.percentiles(frametimer.DRAW)
+    {'p50': 1.2, 'p95': 4.8, 'p99': 11.0, 'max': 23.5}
+
+All times are in milliseconds. Time spent waiting for the next frame or
+for input is not part of any frame.
+
+"""
+
+import math
+import timeit
+
+
+EVENTS = 0
+UPDATE = 1
+DRAW = 2
+BLIT = 3
+FLIP = 4
+TOTAL = 5   # the whole frame
+
+PHASE_NAMES = ('events', 'update', 'draw', 'blit', 'flip', 'total')
+
+enabled = True
+
+_clock = timeit.default_timer
+
+_frames = [None] * 300
+_index = 0
+_count = 0
+_current = None
+_start = 0
+_last = 0
+
+
+def set_history(frame_count):
+    """Keep the timings of the last `frame_count` frames."""
+    global _frames
+    _frames = [None] * frame_count
+    reset()
+
+
+def begin_frame():
+    global _current, _start, _last
+    if not enabled:
+        return
+    _current = [0.0] * (TOTAL + 1)
+    _start = _last = _clock()
+
+
+def lap(phase):
+    """Charge the time since the previous lap, or frame start, to `phase`."""
+    global _last
+    if _current is None:
+        return
+    now = _clock()
+    _current[phase] += (now - _last) * 1000
+    _last = now
+
+
+def end_frame():
+    global _current, _index, _count
+    if _current is None:
+        return
+    _current[TOTAL] = (_clock() - _start) * 1000
+    _frames[_index] = _current
+    _index = (_index + 1) % len(_frames)
+    _count = min(_count + 1, len(_frames))
+    _current = None
+
+
+def frames():
+    """Timings of the recorded frames, oldest first.
+
+    Each is a list of milliseconds indexed by phase (EVENTS ... TOTAL).
+    """
+    size = len(_frames)
+    return [_frames[(_index - _count + i) % size] for i in range(_count)]
+
+
+def percentiles(phase=TOTAL, percents=(50, 95, 99)):
+    """The given percentiles and the maximum of a phase's recent times.
+
+    Returns a dict like {'p50': ..., 'p95': ..., 'p99': ..., 'max': ...},
+    which is empty when no frames were recorded.
+    """
+    return percentiles_of([frame[phase] for frame in frames()], percents)
+
+
+def percentiles_of(times, percents=(50, 95, 99)):
+    """Like `percentiles`, but of any list of times."""
+    times = sorted(times)
+    if len(times) == 0:
+        return {}
+    result = {}
+    for percent in percents:
+        rank = int(math.ceil(percent / 100.0 * len(times)))
+        result['p%d' % percent] = times[max(0, min(len(times), rank) - 1)]
+    result['max'] = times[-1]
+    return result
+
+
+def summary():
+    """percentiles for every phase, keyed by phase name."""
+    return dict((name, percentiles(phase))
+                for phase, name in enumerate(PHASE_NAMES))
+
+
+def reset():
+    global _index, _count, _current
+    for i in range(len(_frames)):
+        _frames[i] = None
+    _index = _count = 0
+    _current = None
@@ -0,0 +1,362 @@
+"""Render text by composing cached glyph images.
+
+Rendering a string with `font.render` rasterizes every glyph again. For
+text that changes often (counters, timers, text being typed) it is much
+cheaper to rasterize each glyph once, keep it in an atlas, and compose
+strings by blitting glyphs:
+
+    surface = glyphs.render(font, '00:42', True, (255, 255, 255))
+
+There is an atlas per (font, antialias, color). Glyphs are packed into
+pages of PAGE_SIZE pixels. Glyphs are placed using the advance of each
+pair of adjacent characters as measured by the font, so kerning is kept.
+
+Text being typed can be kept in a GlyphLine, which changes just the part
+of the composed line that was edited.
+
+"""
+
+import bisect
+import collections
+
+import pygame
+
+from render import recolor, shadowed
+
+
+PAGE_SIZE = (256, 256)
+
+# Maximum number of atlases kept; the least recently used go first.
+max_atlases = 64
+
+_atlases = collections.OrderedDict()
+
+
+def get_atlas(font, antialias, color):
+    """The glyph atlas of a font rendered in a color."""
+    key = (font, bool(antialias), tuple(color))
+    atlas = _atlases.pop(key, None)
+    if atlas is None:
+        atlas = GlyphAtlas(font, antialias, color)
+        while len(_atlases) >= max_atlases:
+            _atlases.popitem(last=False)
+    _atlases[key] = atlas   # most recently used last
+    return atlas
+
+
+def render(font, text, antialias, color):
+    """Like font.render(text, antialias, color) but from cached glyphs.
+
+    Returns a surface with per-pixel alpha.
+    """
+    return get_atlas(font, antialias, color).render(text)
+
+
+def clear():
+    _atlases.clear()
+
+
+class GlyphAtlas(object):
+    """The glyphs of a font, rendered in one color, packed into pages."""
+
+    def __init__(self, font, antialias, color):
+        self.font = font
+        self.antialias = antialias
+        self.color = color
+        self.pages = []
+        self._glyphs = {}       # char -> (page, rect)
+        self._advances = {}     # (char, next char) -> pixels
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_h = 0
+        self.height = font.size(' ')[1]
+
+    def glyph(self, char):
+        """The page and area in it of a character's image."""
+        try:
+            return self._glyphs[char]
+        except KeyError:
+            image = self.font.render(char, self.antialias, self.color)
+            glyph = self._place(image)
+            self._glyphs[char] = glyph
+            return glyph
+
+    def _place(self, image):
+        w, h = image.get_size()
+        page_w, page_h = PAGE_SIZE
+        if w > page_w or h > page_h:
+            # Too large to share a page.
+            page = pygame.Surface((w, h), pygame.SRCALPHA, 32)
+            page.blit(image, (0, 0))
+            return page, page.get_rect()
+
+        if self._shelf_x + w > page_w:
+            self._shelf_x = 0
+            self._shelf_y += self._shelf_h
+            self._shelf_h = 0
+        if len(self.pages) == 0 or self._shelf_y + h > page_h:
+            self.pages.append(pygame.Surface(PAGE_SIZE, pygame.SRCALPHA, 32))
+            self._shelf_x = self._shelf_y = self._shelf_h = 0
+
+        page = self.pages[-1]
+        rect = pygame.Rect(self._shelf_x, self._shelf_y, w, h)
+        page.blit(image, rect)
+        self._shelf_x += w
+        self._shelf_h = max(self._shelf_h, h)
+        return page, rect
+
+    def advance(self, char, next_char):
+        """Pixels from the start of `char` to the start of `next_char`."""
+        pair = (char, next_char)
+        try:
+            return self._advances[pair]
+        except KeyError:
+            size = self.font.size
+            advance = size(char + next_char)[0] - size(next_char)[0]
+            self._advances[pair] = advance
+            return advance
+
+    def render(self, text):
+        """A new surface with `text` composed from the glyphs."""
+        glyphs = self._glyphs
+        advances = self._advances
+        blits = []
+        x = 0
+        height = self.height
+        previous = None
+        for char in text:
+            if previous is not None:
+                advance = advances.get((previous, char))
+                if advance is None:
+                    advance = self.advance(previous, char)
+                x += advance
+            glyph = glyphs.get(char)
+            if glyph is None:
+                glyph = self.glyph(char)
+            blits.append((glyph[0], (x, 0), glyph[1]))
+            # Glyphs reaching below the descent make the text taller.
+            height = max(height, glyph[1].h)
+            previous = char
+
+        width = x + self.font.size(previous)[0] if previous else 0
+        surface = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+        if hasattr(surface, 'blits'):
+            surface.blits(blits, False)
+        else:
+            for page, position, rect in blits:
+                surface.blit(page, position, rect)
+        return surface
+
+
+class GlyphLine(object):
+    """A line of text composed from glyphs that is edited in place.
+
+    Replacing part of the text moves the pixels after the change with
+    Surface.scroll and composes only the glyphs around it, so an edit
+    costs about the same in a long line as in a short one. The result
+    is the same as rendering the whole line again with the atlas (and
+    render.shadowed, when there is a shadow); the text is not stripped.
+
+    Attributes:
+
+        text_surface
+
+            The text, like GlyphAtlas.render(text).
+
+        surface
+
+            The text over its shadow, laid out as by render.shadowed,
+            or text_surface when there is no shadow.
+
+        starts
+
+            The x of each character in text_surface.
+
+    """
+
+    def __init__(self, atlas, text='', shadow_color=None, shadow_offset=None):
+        self.atlas = atlas
+        self.shadow_color = shadow_color
+        if shadow_color is None or shadow_offset is None:
+            self.shadow_offset = None
+        else:
+            self.shadow_offset = tuple(shadow_offset)
+        self._build(text)
+
+    @property
+    def text_size(self):
+        return self.text_surface.get_size()
+
+    def _width(self, text, starts):
+        if len(text) == 0:
+            return 0
+        return starts[-1] + self.atlas.font.size(text[-1])[0]
+
+    def _build(self, text):
+        atlas = self.atlas
+        self.text = text
+        self.starts = starts = []
+        x = 0
+        for i, char in enumerate(text):
+            if i > 0:
+                x += atlas.advance(text[i - 1], char)
+            starts.append(x)
+        self._widest = max([atlas.glyph(char)[1].w for char in set(text)] or
+                           [0])
+
+        text_surface = atlas.render(text)
+        w, self.height = text_surface.get_size()
+        capacity = max(64, w * 2)
+        self._text_backing = pygame.Surface((capacity, self.height),
+                                            pygame.SRCALPHA, 32)
+        self._text_backing.blit(text_surface, (0, 0))
+        if self.shadow_offset is None:
+            self._backing = self._text_backing
+        else:
+            dx, dy = self.shadow_offset
+            self._backing = pygame.Surface(
+                (capacity + abs(dx), self.height + abs(dy)),
+                pygame.SRCALPHA, 32)
+            self._backing.blit(shadowed(text_surface, self.shadow_color,
+                                        self.shadow_offset), (0, 0))
+        self._set_width(w)
+
+    def _set_width(self, w):
+        self.text_surface = self._text_backing.subsurface((0, 0,
+                                                           w, self.height))
+        if self.shadow_offset is None:
+            self.surface = self.text_surface
+        else:
+            dx, dy = self.shadow_offset
+            self.surface = self._backing.subsurface(
+                (0, 0, w + abs(dx), self.height + abs(dy)))
+
+    def replace(self, start, end, text):
+        """Replace the characters from `start` to `end` with `text`.
+
+        Returns the range (left, right) of x in `surface` that changed.
+        """
+        atlas = self.atlas
+        old_text, old_starts = self.text, self.starts
+        old_w = self.text_surface.get_width()
+        new_text = old_text[:start] + text + old_text[end:]
+
+        widest = self._widest
+        for char in set(text):
+            page, rect = atlas.glyph(char)
+            if rect.h > self.height:
+                # A taller glyph makes the whole line taller.
+                self._build(new_text)
+                return 0, self.surface.get_width()
+            widest = max(widest, rect.w)
+        self._widest = widest
+
+        # The characters up to `start` stay where they were; those from
+        # the end of the change on all move by the same amount.
+        q = start + len(text)
+        starts = old_starts[:start]
+        x = starts[-1] if starts else 0
+        for i in range(start, min(q + 1, len(new_text))):
+            if i > 0:
+                x += atlas.advance(new_text[i - 1], new_text[i])
+            starts.append(x)
+        if end < len(old_text):
+            delta = starts[q] - old_starts[end]
+            starts.extend([s + delta for s in old_starts[end + 1:]])
+        else:
+            delta = 0
+        new_w = self._width(new_text, starts)
+        self.text, self.starts = new_text, starts
+
+        # Only the pixels between `left` and `right` are composed again.
+        # Glyphs may reach up to `widest` pixels past where they start.
+        left = min(old_starts[start] if start < len(old_text) else old_w,
+                   starts[start] if start < len(new_text) else new_w)
+        right = left
+        if q > 0:
+            right = max(right, starts[q - 1] + widest)
+        if end > 0:
+            right = max(right, old_starts[end - 1] + widest + delta)
+        if end >= len(old_text):
+            right = max(right, new_w)
+        left = min(left, right - delta)
+
+        capacity = self._text_backing.get_width()
+        if max(new_w, right) > capacity:
+            self._grow(max(new_w, right) * 2)
+
+        shadow = self.shadow_offset
+        dx = shadow[0] if shadow else 0
+        ox = max(0, -dx)
+        if end < len(old_text) and delta != 0:
+            self._move_tail(self._text_backing, min(right, right - delta),
+                            delta)
+            if shadow is not None:
+                self._move_tail(self._backing,
+                                min(right, right - delta) + ox + max(0, dx),
+                                delta)
+        self._set_width(new_w)
+        self._compose(max(0, left), right)
+
+        if shadow is None:
+            return max(0, left), right
+        return (max(0, left + ox + min(0, dx)),
+                right + ox + max(0, dx))
+
+    def _grow(self, capacity):
+        text_backing = pygame.Surface((capacity, self.height),
+                                      pygame.SRCALPHA, 32)
+        text_backing.blit(self._text_backing, (0, 0))
+        if self.shadow_offset is None:
+            self._backing = text_backing
+        else:
+            dx, dy = self.shadow_offset
+            backing = pygame.Surface((capacity + abs(dx),
+                                      self.height + abs(dy)),
+                                     pygame.SRCALPHA, 32)
+            backing.blit(self._backing, (0, 0))
+            self._backing = backing
+        self._text_backing = text_backing
+
+    def _move_tail(self, surface, x, delta):
+        # Scroll the pixels from x on by delta; those scrolled off the
+        # right are beyond the text.
+        w = surface.get_width() - x
+        if w > 0:
+            surface.subsurface((x, 0, w, surface.get_height())).scroll(delta)
+
+    def _compose(self, left, right):
+        """Compose the text again between `left` and `right`."""
+        atlas = self.atlas
+        text, starts = self.text, self.starts
+        area = pygame.Rect(left, 0, right - left, self.height)
+        backing = self._text_backing
+        backing.set_clip(area)
+        backing.fill((0, 0, 0, 0))
+        first = bisect.bisect_left(starts, left - self._widest)
+        last = bisect.bisect_left(starts, right)
+        for i in range(first, last):
+            page, rect = atlas.glyph(text[i])
+            backing.blit(page, (starts[i], 0), rect)
+        backing.set_clip(None)
+
+        if self.shadow_offset is None:
+            return
+        # The same as render.shadowed over the changed area.
+        dx, dy = self.shadow_offset
+        ox, oy = max(0, -dx), max(0, -dy)
+        text_rect = self.text_surface.get_rect()
+        area = pygame.Rect(left + ox + min(0, dx), 0,
+                           right - left + abs(dx), self._backing.get_height())
+        self._backing.set_clip(area)
+        self._backing.fill((0, 0, 0, 0))
+        source = area.move(-ox - dx, 0).clip(text_rect)
+        if source.w > 0:
+            shadow = recolor(self.text_surface.subsurface(source),
+                                    self.shadow_color)
+            self._backing.blit(shadow, (source.left + ox + dx, oy + dy))
+        source = area.move(-ox, 0).clip(text_rect)
+        if source.w > 0:
+            self._backing.blit(self.text_surface, (source.left + ox, oy),
+                               source)
+        self._backing.set_clip(None)
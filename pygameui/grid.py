@@ -6,6 +6,8 @@ import view
 class GridView(view.View):
     """A view which renders a uniform 2-D grid using solid lines."""
 
+    viewport_aware = True
+
     def __init__(self, frame, spacing=50):
         view.View.__init__(self, frame)
         self.spacing = spacing
@@ -17,12 +19,21 @@ class GridView(view.View):
         if not view.View.draw(self):
             return False
 
-        for y in range(self.spacing, self.frame.h, self.spacing):
+        # Only the lines inside the visible part (see View.set_viewport).
+        visible = self._visible_rect()
+        ox, oy = visible.topleft
+        w, h = visible.size
+        first_y = max(1, visible.top // self.spacing) * self.spacing
+        first_x = max(1, visible.left // self.spacing) * self.spacing
+
+        for y in range(first_y, min(self.frame.h, visible.bottom + 1),
+                       self.spacing):
             pygame.draw.line(self.surface, self.line_color,
-                             (0, y), (self.frame.w, y))
+                             (0, y - oy), (w, y - oy))
 
-        for x in range(self.spacing, self.frame.w, self.spacing):
+        for x in range(first_x, min(self.frame.w, visible.right + 1),
+                       self.spacing):
             pygame.draw.line(self.surface, self.line_color,
-                             (x, 0), (x, self.frame.h))
+                             (x - ox, 0), (x - ox, h))
 
         return True
@@ -14,6 +14,8 @@ class ImageView(view.View):
 
     """
 
+    flattenable = False
+
     def __init__(self, frame, img, content_mode=SCALE_TO_FILL):
         """Create an image view from an image.
 
@@ -48,6 +50,7 @@ class ImageView(view.View):
     @image.setter
     def image(self, new_image):
         self._image = new_image
+        self.set_needs_display()
 
     def layout(self):
         assert self.padding[0] == 0 and self.padding[1] == 0
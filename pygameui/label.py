@@ -1,6 +1,10 @@
-import re
+import pygame
 
 import view
+import glyphs
+import render
+import textcache
+import textmetrics
 
 
 CENTER = 0
@@ -9,8 +13,8 @@ RIGHT = 2
 TOP = 3
 BOTTOM = 4
 
-WORD_WRAP = 0
-CLIP = 1
+WORD_WRAP = textmetrics.WORD_WRAP
+CLIP = textmetrics.CLIP
 
 
 class Label(view.View):
@@ -43,7 +47,22 @@ class Label(view.View):
 
             The text to render.
 
-            Changing the text forces a redraw of the label.
+            Changing the text forces a redraw of the label. The text
+            is rendered when the label is next drawn, so changing it
+            (or the style) several times before then renders it once.
+            See also replace_text.
+
+        text_size
+
+            The size of the text as rendered, measured without
+            rendering it (see measure).
+
+        use_glyph_atlas
+
+            Compose the text from cached glyph images (see the glyphs
+            module) instead of having the font rasterize it every time
+            it changes. Worth it for text that changes often, e.g.
+            counters, especially in larger fonts. Default: False.
 
 
     Style attributes:
@@ -80,6 +99,8 @@ class Label(view.View):
 
     """
 
+    viewport_aware = True
+
     def __init__(self, frame, text,
                  halign=CENTER, valign=CENTER,
                  wrap=CLIP):
@@ -90,6 +111,13 @@ class Label(view.View):
         self._wrap_mode = wrap
         self._text = text
         self._enabled = False
+        self.use_glyph_atlas = False
+        self._measured_key = None
+        self._text_dirty = True
+        self.text_surfaces = []
+        self._line_surfaces = []
+        self._editing = False   # see replace_text
+        self._line = None
 
     @property
     def text(self):
@@ -98,97 +126,192 @@ class Label(view.View):
     @text.setter
     def text(self, text):
         self._text = text
+        self._editing = False
         self.render()
 
+    def replace_text(self, start, end, text):
+        """Replace the text from `start` to `end` with `text`.
+
+        A single line composed from glyphs (see use_glyph_atlas) is
+        edited in place from then on: the text after the change is
+        moved rather than rendered again, and a left aligned label
+        redraws only from the change to its right. Such text is not
+        stripped of surrounding whitespace. Other text is all rendered
+        again, as when setting the text attribute.
+        """
+        old_text = self._text or ''
+        self._text = old_text[:start] + text + old_text[end:]
+        if not self._editing or '\n' in text or '\r' in text:
+            self._editing = (self.use_glyph_atlas and
+                             self._wrap_mode == CLIP and
+                             '\n' not in self._text and
+                             '\r' not in self._text)
+            self.render()
+            return
+        if self._text_dirty:
+            return      # rendered when drawn
+        old_w = self._line.surface.get_width()
+        left, right = self._line.replace(start, end, text)
+        self._use_line()
+        if self.halign != LEFT:
+            self.set_needs_display()
+            return
+        x = self.padding[0] + self._line_surfaces[0][1][0]
+        right = max(self.frame.w,
+                    x + max(old_w, self._line.surface.get_width()))
+        self.set_needs_display(pygame.Rect(x + left, 0, right - x - left,
+                                           self.frame.h))
+
     @property
     def wrap_mode(self):
         return self._wrap_mode
 
-    @property
+    @wrap_mode.setter
     def wrap_mode(self, mode):
         self._wrap_mode = mode
+        self._editing = self._editing and mode == CLIP
         self.render()
 
+    @property
+    def text_size(self):
+        if not self._text:
+            return (0, 0)
+        return self._measured()[1]
+
+    @property
+    def text_shadow_surfaces(self):
+        """The shadow of each rendered line, made on request.
+
+        Kept for compatibility: shadows are now drawn together with
+        their text (see render.shadowed) and not stored separately.
+        """
+        if (self.text_shadow_color is None or
+            self.text_shadow_offset is None):
+            return []
+        if self._text_dirty:
+            self._render()
+        return [render.recolor(text_surface, self.text_shadow_color)
+                for text_surface in self.text_surfaces]
+
     def layout(self):
         self.render()
         view.View.layout(self)
 
     def render(self):
-        """Force (re)draw the text to cached surfaces.
+        """Have the text rendered again before the label is next drawn.
         """
-        self._render(self._text)
+        self._text_dirty = True
+        self.set_needs_display()
 
-    def _render(self, text):
-        self.text_surfaces, self.text_shadow_surfaces = [], []
+    def _render(self):
+        self.text_surfaces, self._line_surfaces = [], []
+        self._line = None
+        self._text_dirty = False
 
-        if text is None or len(text) == 0:
-            self._text = None
-            self.text_size = (0, 0)
-            return
-
-        text = text.replace("\r\n", "\n").replace("\r", "\n")
         wants_shadows = (self.text_shadow_color is not None and
                          self.text_shadow_offset is not None)
 
-        if self._wrap_mode == CLIP:
-            self._text = re.sub(r'[\n\t]{2, }', ' ', text)
-            self.text_size = self._render_line(self._text, wants_shadows)
-        elif self._wrap_mode == WORD_WRAP:
-            self._render_word_wrapped(text, wants_shadows)
+        if self._editing and self.use_glyph_atlas:
+            atlas = glyphs.get_atlas(self.font, True, self.text_color)
+            if wants_shadows:
+                self._line = glyphs.GlyphLine(atlas, self._text or '',
+                                              self.text_shadow_color,
+                                              self.text_shadow_offset)
+            else:
+                self._line = glyphs.GlyphLine(atlas, self._text or '')
+            self._use_line()
+            return
+        self._editing = False
+
+        if self._text is None or len(self._text) == 0:
+            return
+
+        lines, _ = self._measured()
+        for line in lines:
+            self._render_line(line, wants_shadows)
+
+    def _use_line(self):
+        # Show the line being edited in place (see replace_text).
+        line = self._line
+        self.text_surfaces = [line.text_surface]
+        if line.shadow_offset is None:
+            self._line_surfaces = [(line.surface, (0, 0))]
+        else:
+            dx, dy = line.shadow_offset
+            self._line_surfaces = [(line.surface, (min(0, dx), min(0, dy)))]
 
     def _render_line(self, line_text, wants_shadows):
         line_text = line_text.strip()
-        text_surface = self.font.render(line_text, True, self.text_color)
+        text_surface = self._render_text(line_text)
         self.text_surfaces.append(text_surface)
         if wants_shadows:
-            text_shadow_surface = self.font.render(
-                line_text, True, self.text_shadow_color)
-            self.text_shadow_surfaces.append(text_shadow_surface)
+            # The text and its shadow are drawn with a single blit.
+            line_surface = self._render_shadowed(line_text, text_surface)
+            dx, dy = self.text_shadow_offset
+            self._line_surfaces.append((line_surface, (min(0, dx),
+                                                       min(0, dy))))
+        else:
+            self._line_surfaces.append((text_surface, (0, 0)))
         return text_surface.get_size()
 
-    def _render_word_wrapped(self, text, wants_shadows):
-        self._text = text
-        self.text_size = [0, 0]
-
-        line_width = 0
-        max_line_width = self.frame.w - self.padding[0] * 2
-
-        line_tokens = []
-        tokens = re.split(r'(\s)', self._text)
-        token_widths = {}
-
-        for token in tokens:
-            if len(token) == 0:
-                continue
-
-            token_width, _ = token_widths.setdefault(token,
-                                                     self.font.size(token))
-
-            if token == '\n' or token_width + line_width >= max_line_width:
-                line_size = self._render_line(''.join(line_tokens),
-                                              wants_shadows)
-                self.text_size[0] = max(self.text_size[0], line_size[0])
-                self.text_size[1] += line_size[1]
-
-                if token == '\n':
-                    line_tokens, line_width = [], 0
-                else:
-                    line_tokens, line_width = [token], token_width
-            else:
-                line_width += token_width
-                line_tokens.append(token)
-
-        if len(line_tokens) > 0:
-            line_size = self._render_line(''.join(line_tokens),
-                                          wants_shadows)
-            self.text_size[0] = max(self.text_size[0], line_size[0])
-            self.text_size[1] += line_size[1]
+    def _render_text(self, text):
+        if self.use_glyph_atlas:
+            return glyphs.render(self.font, text, True, self.text_color)
+        return textcache.render(self.font, text, True, self.text_color)
+
+    def _render_shadowed(self, text, text_surface):
+        if self.use_glyph_atlas:
+            return render.shadowed(text_surface, self.text_shadow_color,
+                                   self.text_shadow_offset)
+        return textcache.render_shadowed(self.font, text, True,
+                                         self.text_color,
+                                         self.text_shadow_color,
+                                         self.text_shadow_offset)
+
+    def measure(self, text=None, width=None, wrap_mode=None):
+        """The lines text would be rendered in and their size.
+
+        Nothing is rendered. Defaults to the label's text, the width
+        inside its padding and its wrap mode. Returns (lines, (w, h));
+        see textmetrics.measure.
+        """
+        if text is None:
+            text = self._text
+        if width is None:
+            width = self.frame.w - self.padding[0] * 2
+        if wrap_mode is None:
+            wrap_mode = self._wrap_mode
+        return textmetrics.measure(self.font, text, width, wrap_mode)
+
+    def _measured(self):
+        # The lines of the current text at the current width. Kept, so
+        # rendering after measuring (e.g. by shrink_wrap) does not measure
+        # again.
+        if self._editing:
+            if self._text_dirty:
+                self._render()
+            if self._line is not None:
+                return [self._text], self._line.text_size
+        key = (self._text, self.font, self._wrap_mode,
+               self.frame.w - self.padding[0] * 2)
+        if self._measured_key != key:
+            self._measured_lines = self.measure()
+            self._measured_key = key
+        return self._measured_lines
 
     def shrink_wrap(self):
-        """Tightly bound the current text respecting current padding."""
+        """Tightly bound the current text respecting current padding.
+
+        The text is measured, not rendered, at the current frame width.
+        """
+        lines, (w, h) = self._measured()
+        self.frame.size = (w + self.padding[0] * 2,
+                           h + self.padding[1] * 2)
 
-        self.frame.size = (self.text_size[0] + self.padding[0] * 2,
-                           self.text_size[1] + self.padding[1] * 2)
+        # The lines fit the new width as they are; word wrapping them
+        # again to the tight width could break them differently.
+        if self._measured_key is not None:
+            self._measured_key = self._measured_key[:3] + (w,)
 
     def _determine_top(self):
         if self.valign == TOP:
@@ -210,25 +333,30 @@ class Label(view.View):
         return x
 
     def draw(self):
-        if not view.View.draw(self) or not self._text:
+        if not view.View.draw(self):
+            return False
+        if self._text_dirty:
+            self._render()
+        if not self._text:
             return False
 
-        wants_shadows = (self.text_shadow_color is not None and
-                         self.text_shadow_offset is not None)
-
-        y = self._determine_top()
+        ox, oy = self.surface_origin()
+        y = self._determine_top() - oy
+        bottom = self.surface.get_height()
 
         for index, text_surface in enumerate(self.text_surfaces):
-            x = self._determine_left(text_surface)
-
-            if wants_shadows:
-                text_shadow_surface = self.text_shadow_surfaces[index]
-                top_left = (x + self.text_shadow_offset[0],
-                            y + self.text_shadow_offset[1])
-                self.surface.blit(text_shadow_surface, top_left)
+            h = text_surface.get_size()[1]
+            if y >= bottom:
+                break
+            if y + h < 0:
+                # Scrolled out of the viewport (see View.set_viewport).
+                y += h
+                continue
 
-            self.surface.blit(text_surface, (x, y))
-            y += text_surface.get_size()[1]
+            x = self._determine_left(text_surface) - ox
+            line_surface, (dx, dy) = self._line_surfaces[index]
+            self.surface.blit(line_surface, (x + dx, y + dy))
+            y += h
 
         return True
 
@@ -3,6 +3,7 @@ import pygame
 import dialog
 import window
 import label
+import animation
 
 
 DOWN = 0
@@ -51,13 +52,19 @@ class NotificationView(dialog.DialogView):
 
     def parented(self):
         self.animation_state = DOWN
+        animation.start(self)
         self.frame.top = -self.frame.h
         self.frame.centerx = self.parent.frame.w // 2
         self.stylize()
 
+    def orphaned(self):
+        dialog.DialogView.orphaned(self)
+        animation.stop(self)
+
     def mouse_down(self, button, point):
         dialog.DialogView.mouse_down(self, button, point)
         self.animation_state = UP
+        animation.start(self)
 
     def update(self, dt):
         dialog.DialogView.update(self, dt)
@@ -68,6 +75,8 @@ class NotificationView(dialog.DialogView):
                 self.frame.top = min(self.frame.top, 0)
             else:
                 self.animation_state = IDLE
+                animation.stop(self)
+                animation.wake_after(self, self.auto_close_after)
         elif self.animation_state == UP:
             if self.frame.top > -self.frame.h:
                 self.frame.top -= dt * rate
@@ -77,6 +86,10 @@ class NotificationView(dialog.DialogView):
             self.elapsed += dt
             if self.elapsed > self.auto_close_after:
                 self.animation_state = UP
+                animation.start(self)
+            else:
+                animation.wake_after(self,
+                                     self.auto_close_after - self.elapsed)
 
 
 def show_notification(message):
@@ -0,0 +1,100 @@
+import pygame
+
+import view
+import label
+import frametimer
+
+
+class PerfHUDView(view.View):
+    """An overlay that plots recent frame times.
+
+    Each recorded frame (see the frametimer module) is a bar whose
+    segments are the times of the frame's phases; the horizontal line
+    marks the time budget of one frame at 60 FPS. The label above the
+    bars shows percentiles of the whole frame time.
+
+    Add it to a scene on top of everything else. It redraws on every
+    frame, but does not keep an otherwise idle run loop ticking.
+
+    Style attributes
+
+        phase_colors
+
+            A color for each phase, in frametimer phase order.
+
+        budget_color
+
+            The color of the frame budget line.
+
+    """
+
+    # The plot is drawn below the label.
+    draws_over_children = False
+
+    # Milliseconds of frame time at the top of the plot.
+    max_ms = 50.0
+
+    bar_width = 2
+
+    # Seconds between updates of the percentiles label.
+    stats_interval = 0.5
+
+    def __init__(self, frame):
+        view.View.__init__(self, frame)
+        self.stats_label = label.Label(pygame.Rect(0, 0, frame.w, 1), '',
+                                       halign=label.LEFT)
+        self.add_child(self.stats_label)
+        self.elapsed = 0
+
+    def layout(self):
+        self.stats_label.frame.topleft = (0, 0)
+        self.stats_label.frame.w = self.frame.w
+        self.stats_label.frame.h = (self.stats_label.font.get_linesize() +
+                                    self.stats_label.padding[1] * 2)
+        self.stats_label.layout()
+        view.View.layout(self)
+
+    def update(self, dt):
+        view.View.update(self, dt)
+        self.elapsed += dt
+        if self.elapsed >= self.stats_interval:
+            self.elapsed = 0
+            self.stats_label.text = self._stats_text()
+        self.set_needs_display()
+
+    def _stats_text(self):
+        stats = frametimer.percentiles()
+        if not stats:
+            return ''
+        return 'p50 %.1f p95 %.1f p99 %.1f max %.1f ms' % (
+            stats['p50'], stats['p95'], stats['p99'], stats['max'])
+
+    def draw(self):
+        if not view.View.draw(self):
+            return False
+
+        top = self.stats_label.frame.bottom
+        plot_h = self.frame.h - top
+        if plot_h <= 0:
+            return True
+        scale = plot_h / self.max_ms
+
+        frames = frametimer.frames()
+        count = self.frame.w // self.bar_width
+        x = self.frame.w - min(count, len(frames)) * self.bar_width
+        for frame in frames[-count:]:
+            y = self.frame.h
+            for phase, color in enumerate(self.phase_colors):
+                h = int(round(frame[phase] * scale))
+                if h <= 0:
+                    continue
+                h = min(h, y - top)
+                y -= h
+                self.surface.fill(color, (x, y, self.bar_width, h))
+            x += self.bar_width
+
+        budget_y = self.frame.h - int(1000 / 60.0 * scale)
+        if budget_y > top:
+            pygame.draw.line(self.surface, self.budget_color,
+                             (0, budget_y), (self.frame.w, budget_y))
+        return True
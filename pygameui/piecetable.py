@@ -0,0 +1,198 @@
+"""A piece table: text that is cheap to edit anywhere.
+
+The text is never copied as it is edited. It is described by a list of
+pieces, each a run of characters of one of two buffers: the original
+text, which never changes, and an append-only buffer of all the text
+ever inserted. Inserting appends to the latter and splits a piece;
+deleting drops pieces. Since the buffers never change, pieces stay valid
+after being removed, so an edit can be undone by putting them back; see
+`TextEditor`.
+
+    table = PieceTable('hello world')
+    table.insert(5, ',')
+    removed = table.delete(0, 5)        # pieces of 'hello'
+    table.insert_pieces(0, removed)     # undone
+    table.text                          # 'hello, world'
+
+Pieces are (buffer, start, length) tuples; ORIGINAL and ADDED name the
+buffers.
+
+The pieces are kept in blocks of about BLOCK_SIZE, along with where each
+block starts in the text. Finding the piece at a position is a binary
+search over the blocks and a short scan of one, and an edit only moves
+the starts of the blocks after it, so edits stay cheap however many
+pieces the text is cut into.
+
+"""
+
+import bisect
+
+
+ORIGINAL = 0
+ADDED = 1
+
+# Blocks holding more than twice this many pieces are split.
+BLOCK_SIZE = 64
+
+
+class PieceTable(object):
+    """Text stored as pieces of an original and an added buffer."""
+
+    def __init__(self, text=''):
+        self._original = text
+        self._added = []        # characters
+        self._blocks = [[[ORIGINAL, 0, len(text)]]] if text else []
+        self._block_lengths = [len(text)] if text else []
+        self._block_starts = [0] if text else []
+        self._length = len(text)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def text(self):
+        return self.pieces_text(piece for block in self._blocks
+                                for piece in block)
+
+    def piece_count(self):
+        return sum(len(block) for block in self._blocks)
+
+    def pieces_text(self, pieces):
+        """The text that `pieces` stand for."""
+        added = self._added
+        return ''.join(self._original[start:start + length]
+                       if buffer == ORIGINAL else
+                       ''.join(added[start:start + length])
+                       for buffer, start, length in pieces)
+
+    def slice(self, start, end):
+        """The text from `start` to `end`, like text[start:end]."""
+        result = []
+        blocks = self._blocks
+        b, i, position = self._find(start)
+        while b < len(blocks) and position < end:
+            block = blocks[b]
+            while i < len(block) and position < end:
+                buffer, piece_start, length = block[i]
+                first = max(start - position, 0)
+                last = min(end - position, length)
+                result.append((buffer, piece_start + first, last - first))
+                position += length
+                i += 1
+            b, i = b + 1, 0
+        return self.pieces_text(result)
+
+    def insert(self, position, text):
+        """Insert `text` at `position`. Returns the piece inserted."""
+        start = len(self._added)
+        self._added.extend(text)
+        piece = (ADDED, start, len(text))
+        if len(text) > 0:
+            self._insert_piece(position, piece)
+        return piece
+
+    def insert_pieces(self, position, pieces):
+        """Insert pieces, e.g. ones returned by `delete`, at `position`."""
+        pieces = [list(piece) for piece in pieces if piece[2] > 0]
+        if len(pieces) == 0:
+            return
+        b, i = self._split(position)
+        blocks = self._blocks
+        if b == len(blocks):
+            if b == 0:
+                blocks.append([])
+            else:
+                b -= 1
+                i = len(blocks[b])
+        blocks[b][i:i] = pieces
+        self._length += sum(piece[2] for piece in pieces)
+        self._update(b, b + 1)
+
+    def delete(self, position, length):
+        """Delete `length` characters. Returns the pieces deleted."""
+        length = min(length, self._length - position)
+        if length <= 0:
+            return []
+        first, i = self._split(position)
+        last, j = self._split(position + length)
+        blocks = self._blocks
+        if first == last:
+            removed = blocks[first][i:j]
+            del blocks[first][i:j]
+        else:
+            removed = blocks[first][i:]
+            del blocks[first][i:]
+            for block in blocks[first + 1:last]:
+                removed.extend(block)
+            if last < len(blocks):
+                removed.extend(blocks[last][:j])
+                del blocks[last][:j]
+            del blocks[first + 1:last]
+            del self._block_lengths[first + 1:last]
+        self._length -= length
+        self._update(first, min(first + 2, len(blocks)))
+        return [tuple(piece) for piece in removed]
+
+    def _insert_piece(self, position, piece):
+        b, i = self._split(position)
+        if i > 0 or b > 0:
+            # Text typed in a row goes into the piece it continues.
+            if i == 0:
+                b, i = b - 1, len(self._blocks[b - 1])
+            previous = self._blocks[b][i - 1]
+            if (previous[0] == ADDED and
+                previous[1] + previous[2] == piece[1]):
+                previous[2] += piece[2]
+                self._length += piece[2]
+                self._update(b, b + 1)
+                return
+        self.insert_pieces(position, [piece])
+
+    def _find(self, position):
+        """The block and piece `position` is in, and where that piece
+        starts; past the end, (block count, 0, length)."""
+        if position >= self._length:
+            return len(self._blocks), 0, self._length
+        b = max(0, bisect.bisect_right(self._block_starts, position) - 1)
+        offset = self._block_starts[b]
+        for i, piece in enumerate(self._blocks[b]):
+            if position < offset + piece[2]:
+                return b, i, offset
+            offset += piece[2]
+
+    def _split(self, position):
+        """The block, and index in it, of the piece starting at
+        `position`, splitting the piece it falls in if needed.
+
+        The block may then be too large until it is _update'd.
+        """
+        b, i, offset = self._find(position)
+        if b < len(self._blocks) and position > offset:
+            block = self._blocks[b]
+            buffer, start, length = block[i]
+            cut = position - offset
+            block[i:i + 1] = [[buffer, start, cut],
+                              [buffer, start + cut, length - cut]]
+            i += 1
+        return b, i
+
+    def _update(self, first, last):
+        """Account for changes to the pieces of blocks `first` to `last`."""
+        blocks = []
+        for block in self._blocks[first:last]:
+            while len(block) > BLOCK_SIZE * 2:
+                blocks.append(block[:BLOCK_SIZE])
+                block = block[BLOCK_SIZE:]
+            if len(block) > 0:
+                blocks.append(block)
+        self._blocks[first:last] = blocks
+        lengths = self._block_lengths
+        lengths[first:last] = [sum(piece[2] for piece in block)
+                               for block in blocks]
+
+        starts = self._block_starts
+        del starts[first:]
+        position = starts[-1] + lengths[first - 1] if first > 0 else 0
+        for length in lengths[first:]:
+            starts.append(position)
+            position += length
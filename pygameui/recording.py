@@ -0,0 +1,149 @@
+"""Record input events and replay them.
+
+A session's input can be recorded to a file and replayed later through
+the same dispatch code, to reproduce a slow session exactly or to measure
+a change against identical input:
+
+    recording.start('session.events')
+    pygameui.run()      # use the app, then quit
+
+    ...
+
+    pygameui.init(headless=True)
+    scene.push(MyScene())
+    recording.replay('session.events')
+
+The file has a JSON header line followed by one JSON line per event:
+[milliseconds since recording started, event type name, attributes].
+Event times come from the frame clock: an event is stamped with the end
+of the `dt` of the frame it is dispatched in, which is when it was
+received. A session stepped with a fixed dt thus replays frame for
+frame. Time the run loop slept with nothing animating is not counted
+(see pygameui.run), so idle periods replay without a wait. Key events
+keep their modifier keys, which views read from window.key_mods.
+
+"""
+
+import json
+import time
+
+import pygame
+
+
+# Recorded event types and the attributes kept for each.
+ATTRIBUTES = {
+    pygame.MOUSEBUTTONDOWN: ('pos', 'button'),
+    pygame.MOUSEBUTTONUP: ('pos', 'button'),
+    pygame.MOUSEMOTION: ('pos', 'rel', 'buttons'),
+    pygame.KEYDOWN: ('key', 'mod', 'unicode'),
+    pygame.KEYUP: ('key', 'mod'),
+    pygame.QUIT: (),
+}
+
+VERSION = 2
+
+# Version 1 stamped events a frame early; they replay a frame early.
+_READABLE_VERSIONS = (1, VERSION)
+
+_file = None
+_time = 0
+
+
+def start(path):
+    """Record the events dispatched from now on to the file at `path`."""
+    global _file, _time
+    stop()
+    _file = open(path, 'w')
+    _time = 0
+    header = dict(version=VERSION,
+                  window_size=pygame.display.get_surface().get_size())
+    _file.write(json.dumps(header) + '\n')
+
+
+def stop():
+    global _file
+    if _file is not None:
+        _file.close()
+        _file = None
+
+
+def is_recording():
+    return _file is not None
+
+
+def capture(events, dt):
+    """Record the events of a frame lasting `dt` seconds.
+
+    Called by the run loop before the events are dispatched.
+    """
+    global _time
+    if _file is None:
+        return
+    # The events arrived while the time of this frame passed.
+    _time += dt * 1000
+    for e in events:
+        names = ATTRIBUTES.get(e.type)
+        if names is None:
+            continue
+        attrs = dict((name, getattr(e, name)) for name in names)
+        line = [int(round(_time)), pygame.event.event_name(e.type), attrs]
+        _file.write(json.dumps(line, separators=(',', ':')) + '\n')
+    if any(e.type == pygame.QUIT for e in events):
+        stop()
+
+
+def load(path):
+    """The recorded events in a file as a list of (milliseconds, event)."""
+    types = dict((pygame.event.event_name(event_type), event_type)
+                 for event_type in ATTRIBUTES)
+    events = []
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get('version') not in _READABLE_VERSIONS:
+            raise ValueError('unsupported recording version: %r' %
+                             header.get('version'))
+        for line in f:
+            ms, type_name, attrs = json.loads(line)
+            for name in ('pos', 'rel', 'buttons'):
+                if name in attrs:
+                    attrs[name] = tuple(attrs[name])
+            events.append((ms, pygame.event.Event(types[type_name], attrs)))
+    return events
+
+
+def replay(path, dt=1 / 60.0, realtime=False):
+    """Replay recorded events into the current scene.
+
+    Frames of `dt` seconds are stepped (see pygameui.step) and each
+    recorded event is dispatched in the frame its time falls in. By
+    default frames run as fast as possible; with `realtime` the replay
+    waits to take as long as the recording did.
+
+    Returns the number of frames stepped.
+    """
+    import pygameui
+
+    events = load(path)
+    frame_ms = dt * 1000
+    frame = 0
+    index = 0
+    started = time.time()
+
+    while index < len(events):
+        # Times were rounded to whole milliseconds when recorded.
+        frame_end = (frame + 1) * frame_ms + 0.5
+        frame_events = []
+        while index < len(events) and events[index][0] <= frame_end:
+            frame_events.append(events[index][1])
+            index += 1
+
+        frame += 1
+        if pygameui.step(1, dt, frame_events) is None:
+            break
+
+        if realtime:
+            delay = started + frame * dt - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+    return frame
@@ -1,5 +1,43 @@
+import collections
+
 import pygame
 
+import resource
+import surfaces
+
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    numpy = None
+
+
+# Gradients are expensive to compute, so each is computed once into a
+# narrow strip along its length, which is tiled over the part of the
+# gradient being drawn. Least recently used strips are dropped to stay
+# within budget.
+
+gradient_cache_max_bytes = 16 * 1024 * 1024
+
+# Width of the strips across the gradient.
+GRADIENT_STRIP_WIDTH = 32
+
+_gradient_cache = collections.OrderedDict()
+_gradient_cache_bytes = 0
+_gradient_cache_hits = 0
+_gradient_cache_misses = 0
+
+# Shadows are built from the corners and edges of the shadow image; the
+# same few sizes are used over and over (e.g. every alert), so they are
+# cached too.
+
+shadow_cache_max_entries = 16
+
+# Width of the soft edge of resources/images/shadow.png.
+SHADOW_IMAGE_BORDER = 25
+
+_shadow_cache = collections.OrderedDict()
+
 
 def fill_gradient(surface, color, gradient,
                   rect=None, vertical=True, forward=True):
@@ -29,46 +67,297 @@ def fill_gradient(surface, color, gradient,
     See http://www.pygame.org/wiki/GradientCode
     """
 
+    fill_gradient_stops(surface, (color, gradient), rect=rect,
+                        vertical=vertical, forward=forward)
+
+
+def fill_gradient_stops(surface, stops, rect=None, vertical=True,
+                        forward=True):
+    """Fill a surface with a linear gradient through two or more colors.
+
+    The colors in `stops` are spaced evenly from the start of the
+    gradient to its end. See fill_gradient for the other arguments.
+
+    The gradient is built with a single NumPy array operation when
+    NumPy is available and drawn line by line otherwise. Only the part
+    of `rect` inside the surface's clip area is drawn.
+    """
+
     if rect is None:
         rect = surface.get_rect()
-
-    x1, x2 = rect.left, rect.right
-    y1, y2 = rect.top, rect.bottom
+    else:
+        rect = pygame.Rect(rect)
 
     if vertical:
-        h = y2 - y1
+        h = rect.h
     else:
-        h = x2 - x1
+        h = rect.w
 
     assert h > 0
+    assert len(stops) >= 2
 
-    if forward:
-        a, b = color, gradient
+    if not forward:
+        stops = tuple(reversed(stops))
+
+    area = rect.clip(surface.get_clip())
+    if area.w == 0 or area.h == 0:
+        return
+
+    if numpy is not None:
+        _fill_gradient_array(surface, stops, rect, area, vertical)
+    else:
+        _fill_gradient_lines(surface, stops, rect, area, vertical)
+
+
+def _fill_gradient_array(surface, stops, rect, area, vertical):
+    if vertical:
+        n = rect.h
+        offsets = numpy.arange(area.top - rect.top, area.bottom - rect.top)
+    else:
+        n = rect.w
+        offsets = numpy.arange(area.left - rect.left,
+                               area.right - rect.left)
+
+    t = offsets.astype(float) / n
+    positions = numpy.linspace(0.0, 1.0, len(stops))
+    colors = numpy.empty((len(offsets), 3))
+    for channel in range(3):
+        colors[:, channel] = numpy.interp(
+            t, positions, [stop[channel] for stop in stops])
+    colors = numpy.clip(colors, 0, 255).astype(numpy.uint8)
+
+    # Make a one pixel wide strip (surfarray arrays are indexed [x][y])
+    # and stretch it over the area.
+    if vertical:
+        strip = colors[numpy.newaxis, :, :]
     else:
-        b, a = color, gradient
+        strip = colors[:, numpy.newaxis, :]
+    strip = pygame.surfarray.make_surface(strip)
+    surface.blit(pygame.transform.scale(strip, area.size), area)
 
-    rate = (float(b[0] - a[0]) / h,
-            float(b[1] - a[1]) / h,
-            float(b[2] - a[2]) / h)
+
+def _fill_gradient_lines(surface, stops, rect, area, vertical):
+    x1, x2 = area.left, area.right
+    y1, y2 = area.top, area.bottom
+
+    if vertical:
+        h = rect.h
+    else:
+        h = rect.w
+
+    segments = len(stops) - 1
+
+    def color_at(offset):
+        # Find the pair of stops around offset and blend between them.
+        pos = float(offset) * segments / h
+        index = min(int(pos), segments - 1)
+        a, b = stops[index], stops[index + 1]
+        t = pos - index
+        return (min(max(a[0] + (b[0] - a[0]) * t, 0), 255),
+                min(max(a[1] + (b[1] - a[1]) * t, 0), 255),
+                min(max(a[2] + (b[2] - a[2]) * t, 0), 255))
 
     fn_line = pygame.draw.line
     if vertical:
         for line in range(y1, y2):
-            color = (min(max(a[0] + (rate[0] * (line - y1)), 0), 255),
-                     min(max(a[1] + (rate[1] * (line - y1)), 0), 255),
-                     min(max(a[2] + (rate[2] * (line - y1)), 0), 255))
-            fn_line(surface, color, (x1, line), (x2, line))
+            fn_line(surface, color_at(line - rect.top),
+                    (x1, line), (x2 - 1, line))
     else:
         for col in range(x1, x2):
-            color = (min(max(a[0] + (rate[0] * (col - x1)), 0), 255),
-                     min(max(a[1] + (rate[1] * (col - x1)), 0), 255),
-                     min(max(a[2] + (rate[2] * (col - x1)), 0), 255))
-            fn_line(surface, color, (col, y1), (col, y2))
+            fn_line(surface, color_at(col - rect.left),
+                    (col, y1), (col, y2 - 1))
+
+
+def is_gradient(color):
+    """Is the color value a sequence of gradient stops?"""
+    return isinstance(color[0], (tuple, list, pygame.Color))
+
+
+def get_gradient(stops, size, vertical=True, forward=True):
+    """A new surface of the given size filled with a linear gradient.
+
+    See fill_gradient_stops for the arguments.
+    """
+    surface = pygame.Surface(size)
+    fillrect(surface, stops, surface.get_rect(), vertical=vertical,
+             forward=forward)
+    return surface
+
+
+def get_gradient_strip(stops, length, vertical=True, forward=True):
+    """A gradient `length` pixels long and GRADIENT_STRIP_WIDTH across.
+
+    The strip is shared through a cache and must not be modified. See
+    fill_gradient_stops for the arguments.
+    """
+    global _gradient_cache_bytes, _gradient_cache_hits, _gradient_cache_misses
+
+    stops = tuple(tuple(stop) for stop in stops)
+    key = (stops, length, vertical, forward)
+    try:
+        strip = _gradient_cache.pop(key)
+    except KeyError:
+        _gradient_cache_misses += 1
+        width = GRADIENT_STRIP_WIDTH
+        strip = pygame.Surface((width, length) if vertical else
+                               (length, width))
+        fill_gradient_stops(strip, stops,
+                            vertical=vertical, forward=forward)
+        _gradient_cache_bytes += surfaces.surface_bytes(strip)
+        while (_gradient_cache_bytes > gradient_cache_max_bytes and
+               len(_gradient_cache) > 0):
+            _, evicted = _gradient_cache.popitem(last=False)
+            _gradient_cache_bytes -= surfaces.surface_bytes(evicted)
+    else:
+        _gradient_cache_hits += 1
+    _gradient_cache[key] = strip
+    return strip
+
+
+def gradient_cache_info():
+    """Statistics about the gradient cache as a dict."""
+    return dict(hits=_gradient_cache_hits,
+                misses=_gradient_cache_misses,
+                entries=len(_gradient_cache),
+                bytes=_gradient_cache_bytes,
+                max_bytes=gradient_cache_max_bytes)
 
 
-def fillrect(surface, color, rect, vertical=True):
-    if len(color) == 2:  # gradient
-        fill_gradient(surface, color[0], color[1],
-                      rect=rect, vertical=vertical)
+def clear_gradient_cache():
+    global _gradient_cache_bytes, _gradient_cache_hits, _gradient_cache_misses
+    _gradient_cache.clear()
+    _gradient_cache_bytes = 0
+    _gradient_cache_hits = 0
+    _gradient_cache_misses = 0
+
+
+def blend_rect(surface, color, rect, vertical=True):
+    """Like fillrect but blends a translucent color with the surface."""
+    if not is_gradient(color) and len(color) == 4 and color[3] < 255:
+        if color[3] > 0:
+            rect = pygame.Rect(rect)
+            overlay = pygame.Surface(rect.size, pygame.SRCALPHA, 32)
+            overlay.fill(color)
+            surface.blit(overlay, rect)
     else:
+        fillrect(surface, color, rect, vertical)
+
+
+def recolor(surface, color):
+    """A copy of a per-pixel alpha surface with its pixels set to `color`.
+
+    Each pixel keeps its alpha (scaled by the alpha of `color`, if any),
+    so the shadow of rendered text can be made from the text itself
+    instead of rendering it again.
+    """
+    alpha = color[3] if len(color) == 4 else 255
+    result = surface.copy()
+    result.fill((0, 0, 0, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+    result.fill((color[0], color[1], color[2], 0),
+                special_flags=pygame.BLEND_RGBA_ADD)
+    return result
+
+
+def shadowed(surface, shadow_color, offset):
+    """`surface` over its shadow moved by `offset`, as one new surface.
+
+    The top-left of `surface` is at (max(0, -dx), max(0, -dy)) in the
+    result, where (dx, dy) is `offset`.
+    """
+    dx, dy = offset
+    w, h = surface.get_size()
+    result = pygame.Surface((w + abs(dx), h + abs(dy)), pygame.SRCALPHA, 32)
+    result.blit(recolor(surface, shadow_color), (max(0, dx), max(0, dy)))
+    result.blit(surface, (max(0, -dx), max(0, -dy)))
+    return result
+
+
+def fillrect(surface, color, rect, vertical=True, forward=True):
+    """Fill `rect` of `surface` with a color or gradient stops.
+
+    Only the part of `rect` inside the surface's clip area is drawn, so
+    redrawing a small damaged area of a large gradient is cheap.
+    """
+    if not is_gradient(color):
         surface.fill(color, rect)
+        return
+
+    rect = pygame.Rect(rect)
+    area = rect.clip(surface.get_clip())
+    if area.w <= 0 or area.h <= 0:
+        return
+
+    # Tiling the strip takes a few plain copies; stretching it would
+    # scale every pixel.
+    width = GRADIENT_STRIP_WIDTH
+    if vertical:
+        strip = get_gradient_strip(color, rect.h, vertical, forward)
+        top = area.top - rect.top
+        blits = [(strip, (x, area.top),
+                  (0, top, min(width, area.right - x), area.h))
+                 for x in range(area.left, area.right, width)]
+    else:
+        strip = get_gradient_strip(color, rect.w, vertical, forward)
+        left = area.left - rect.left
+        blits = [(strip, (area.left, y),
+                  (left, 0, area.w, min(width, area.bottom - y)))
+                 for y in range(area.top, area.bottom, width)]
+    if hasattr(surface, 'blits'):
+        surface.blits(blits, False)
+    else:
+        for source, position, source_rect in blits:
+            surface.blit(source, position, source_rect)
+
+
+def nine_slice(image, size, border, target_border=None):
+    """Stretch an image to the given size keeping its corners intact.
+
+    The image is cut into a 3x3 grid; `border` is the width in pixels of
+    the outer rows and columns. Corners are scaled to `target_border`
+    pixels (default `border`), edges are stretched along their length,
+    and the center fills the rest.
+    """
+    if target_border is None:
+        target_border = border
+
+    w, h = size
+    target_border = max(0, min(target_border, w // 2, h // 2))
+    iw, ih = image.get_size()
+    b, tb = border, target_border
+
+    # (source, target) spans of the left/top, middle and right/bottom.
+    xs = [((0, b), (0, tb)),
+          ((b, iw - b), (tb, w - tb)),
+          ((iw - b, iw), (w - tb, w))]
+    ys = [((0, b), (0, tb)),
+          ((b, ih - b), (tb, h - tb)),
+          ((ih - b, ih), (h - tb, h))]
+
+    surface = pygame.Surface(size, pygame.SRCALPHA, 32)
+    for (sx1, sx2), (tx1, tx2) in xs:
+        for (sy1, sy2), (ty1, ty2) in ys:
+            if tx2 <= tx1 or ty2 <= ty1:
+                continue
+            part = image.subsurface(pygame.Rect(sx1, sy1,
+                                                sx2 - sx1, sy2 - sy1))
+            part = pygame.transform.smoothscale(part,
+                                                (tx2 - tx1, ty2 - ty1))
+            surface.blit(part, (tx1, ty1))
+    return surface
+
+
+def get_shadow(size, border):
+    """A drop shadow of the given size with soft edges `border` wide.
+
+    The surface is shared through a cache and must not be modified.
+    """
+    key = (tuple(size), border)
+    try:
+        shadow = _shadow_cache.pop(key)
+    except KeyError:
+        shadow = nine_slice(resource.get_image('shadow'), size,
+                            SHADOW_IMAGE_BORDER, border)
+        while len(_shadow_cache) >= shadow_cache_max_entries:
+            _shadow_cache.popitem(last=False)
+    _shadow_cache[key] = shadow
+    return shadow
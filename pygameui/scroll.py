@@ -3,6 +3,7 @@ import pygame
 import view
 import render
 import callback
+import tiles
 
 
 HORIZONTAL = 0
@@ -126,9 +127,14 @@ class ScrollView(view.View):
         on_scrolled(scroll_view)
             content offset was updated.
 
+    With `tiled`, the content view is drawn in tiles that are cached as
+    it scrolls (see the tiles module). Use it for large content that
+    changes rarely. The content view's class must support drawing just
+    a part of itself (see View.set_viewport); otherwise it is not tiled.
+
     """
 
-    def __init__(self, frame, content_view):
+    def __init__(self, frame, content_view, tiled=False):
         width = frame.size[0] + SCROLLBAR_SIZE
         height = frame.size[1] + SCROLLBAR_SIZE
         rect = pygame.Rect(frame.topleft, (width, height))
@@ -138,6 +144,11 @@ class ScrollView(view.View):
 
         self.content_view = content_view
         self._content_offset = (0, 0)
+        if tiled and content_view.can_draw_viewport():
+            content_view.tile_cache = tiles.TileCache()
+        # From its first layout on, the content only gets a surface the
+        # size of the visible part, however large it is.
+        self._update_content_viewport()
         self.add_child(self.content_view)
 
         self.hscrollbar = ScrollbarView(self, HORIZONTAL)
@@ -148,8 +159,24 @@ class ScrollView(view.View):
     def layout(self):
         self.hscrollbar.layout()
         self.vscrollbar.layout()
+        self._update_content_viewport()
         view.View.layout(self)
 
+    def refresh(self):
+        # The content may have been resized or moved since it was last drawn.
+        self._update_content_viewport()
+        return view.View.refresh(self)
+
+    def _update_content_viewport(self):
+        """Have the content draw only the part of it that is in view."""
+        content = self.content_view
+        if not content.can_draw_viewport():
+            return
+        visible = pygame.Rect(-content.frame.left, -content.frame.top,
+                              self.frame.w, self.frame.h)
+        content.set_viewport(visible.clip(pygame.Rect((0, 0),
+                                                      content.frame.size)))
+
     def set_content_offset(self, percent_w, percent_h,
                            update_scrollbar_size=True):
 
@@ -159,6 +186,7 @@ class ScrollView(view.View):
         self.content_view.frame.topleft = (
             -self._content_offset[0] * self.content_view.frame.w,
             -self._content_offset[1] * self.content_view.frame.h)
+        self._update_content_viewport()
 
         if update_scrollbar_size:
             self.vscrollbar.thumb.centery = percent_h * self.vscrollbar.frame.h
@@ -166,6 +194,41 @@ class ScrollView(view.View):
 
         self.on_scrolled(self)
 
+    def is_scrolled_to_bottom(self):
+        thumb = self.vscrollbar.thumb
+        return thumb.frame.bottom >= self.vscrollbar.frame.h - 1
+
+    def scroll_to_bottom(self):
+        """Scroll to the end of the content, e.g. after it grew."""
+        self.scroll_to(self.content_view.frame.h - self.frame.h)
+
+    def scroll_to_visible(self, rect):
+        """Scroll as little as needed to show `rect` of the content."""
+        top = -self.content_view.frame.top
+        visible_h = self.frame.h
+        if not self.hscrollbar.hidden:
+            visible_h -= SCROLLBAR_SIZE
+        if rect.top < top:
+            self.scroll_to(rect.top)
+        elif rect.bottom > top + visible_h:
+            self.scroll_to(rect.bottom - visible_h)
+
+    def scroll_to(self, top):
+        """Scroll vertically to have `top` of the content at the top.
+
+        Also call after the content's height changed. Only the vertical
+        scrollbar is laid out again, not the whole scroll view.
+        """
+        bar = self.vscrollbar
+        content_h = float(max(1, self.content_view.frame.h))
+        offset = max(0, top) / content_h
+        bar.thumb.frame.h = bar.frame.h * min(1, self.frame.h / content_h)
+        bar.thumb.frame.top = bar.frame.h * offset
+        bar.layout()
+        # The thumb is placed in whole pixels, which for long content
+        # is not exactly at the offset.
+        self.set_content_offset(self._content_offset[0], offset, False)
+
     def draw(self):
         if not view.View.draw(self):
             return False
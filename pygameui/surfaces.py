@@ -0,0 +1,121 @@
+"""A pool of backing surfaces for views.
+
+Views that are resized, shown and dismissed often (notifications, alerts,
+drop-down lists) would otherwise allocate a new surface every time they
+are laid out. Released surfaces are kept in buckets of similar sizes and
+handed out again as subsurfaces of the requested size, or whole when
+the size is a multiple of BUCKET_SIZE.
+
+"""
+
+import collections
+
+import pygame
+
+
+# Surface dimensions are rounded up to a multiple of this.
+BUCKET_SIZE = 32
+
+# Maximum bytes kept in idle pooled surfaces.
+max_pooled_bytes = 8 * 1024 * 1024
+
+_pool = collections.OrderedDict()   # bucket key -> [surface]
+_pooled_bytes = 0
+
+allocated = 0
+reused = 0
+released = 0
+
+
+def _bucket_size(size):
+    w, h = size
+    return (max(1, (w + BUCKET_SIZE - 1) // BUCKET_SIZE) * BUCKET_SIZE,
+            max(1, (h + BUCKET_SIZE - 1) // BUCKET_SIZE) * BUCKET_SIZE)
+
+
+def surface_bytes(surface):
+    """The memory used by the pixels of `surface`."""
+    w, h = surface.get_size()
+    return w * h * surface.get_bytesize()
+
+
+def acquire(size, alpha=True):
+    """A cleared surface of the given size.
+
+    With `alpha` the surface has per-pixel alpha; otherwise it is an
+    opaque surface in the display's pixel format, which is much faster
+    to blit.
+    """
+    global allocated, reused, _pooled_bytes
+
+    bucket_size = _bucket_size(size)
+    key = (bucket_size, alpha)
+    try:
+        bucket = _pool[key]
+        whole = bucket.pop()
+    except (KeyError, IndexError):
+        allocated += 1
+        whole = _new_surface(bucket_size, alpha)
+    else:
+        reused += 1
+        _pooled_bytes -= surface_bytes(whole)
+        if len(bucket) == 0:
+            del _pool[key]
+        whole.fill((0, 0, 0, 0))
+    if whole.get_size() == tuple(size):
+        # Blitting from a subsurface costs a little more.
+        return whole
+    return whole.subsurface((0, 0), size)
+
+
+def _new_surface(size, alpha):
+    if alpha:
+        return pygame.Surface(size, pygame.SRCALPHA, 32)
+    surface = pygame.Surface(size)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
+
+
+def is_alpha(surface):
+    return surface.get_flags() & pygame.SRCALPHA != 0
+
+
+def release(surface):
+    """Return a surface obtained from `acquire` to the pool.
+
+    The surface must not be used after it is released.
+    """
+    global released, _pooled_bytes
+
+    whole = surface.get_parent()
+    if whole is None:
+        whole = surface
+    key = (whole.get_size(), is_alpha(whole))
+    bucket = _pool.pop(key, [])
+    bucket.append(whole)
+    _pool[key] = bucket   # most recently used last
+    _pooled_bytes += surface_bytes(whole)
+    released += 1
+
+    while _pooled_bytes > max_pooled_bytes and len(_pool) > 0:
+        key, bucket = _pool.popitem(last=False)
+        for whole in bucket:
+            _pooled_bytes -= surface_bytes(whole)
+
+
+def info():
+    """Allocation counters and pool usage as a dict."""
+    return dict(allocated=allocated,
+                reused=reused,
+                released=released,
+                pooled=sum(len(bucket) for bucket in _pool.itervalues()),
+                pooled_bytes=_pooled_bytes,
+                max_pooled_bytes=max_pooled_bytes)
+
+
+def clear():
+    global allocated, reused, released, _pooled_bytes
+    _pool.clear()
+    _pooled_bytes = 0
+    allocated = reused = released = 0
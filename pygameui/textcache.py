@@ -0,0 +1,78 @@
+"""A process-wide cache of rendered text.
+
+Many labels show the same strings in the same style: the buttons of every
+alert, list rows, repeated status values. Rather than rasterizing its own
+copy, each label gets the rendered text from this cache, keyed by font,
+text, color and antialiasing. The least recently used entries are dropped
+when the cache holds more than `max_bytes` of surfaces.
+
+Surfaces from the cache are shared and must not be modified.
+
+"""
+
+import collections
+
+# Not "import render": this module has its own render function.
+import render as rendering
+import surfaces
+
+
+max_bytes = 4 * 1024 * 1024
+
+_cache = collections.OrderedDict()
+_bytes = 0
+_hits = 0
+_misses = 0
+
+
+def render(font, text, antialias, color):
+    """Like font.render(text, antialias, color), but cached."""
+    key = (font, text, bool(antialias), tuple(color))
+    return _get(key, lambda: font.render(text, antialias, color))
+
+
+def render_shadowed(font, text, antialias, color, shadow_color, offset):
+    """Text over its shadow in one surface (see render.shadowed), cached.
+
+    The shadow is recolored from the rendered text rather than rendered
+    again.
+    """
+    key = (font, text, bool(antialias), tuple(color),
+           tuple(shadow_color), tuple(offset))
+    return _get(key, lambda: rendering.shadowed(
+        render(font, text, antialias, color), shadow_color, offset))
+
+
+def _get(key, make):
+    global _bytes, _hits, _misses
+
+    surface = _cache.pop(key, None)
+    if surface is None:
+        _misses += 1
+        surface = make()
+        _bytes += surfaces.surface_bytes(surface)
+        while _bytes > max_bytes and len(_cache) > 0:
+            _, evicted = _cache.popitem(last=False)
+            _bytes -= surfaces.surface_bytes(evicted)
+    else:
+        _hits += 1
+    _cache[key] = surface   # most recently used last
+    return surface
+
+
+def info():
+    """Cache statistics as a dict."""
+    lookups = _hits + _misses
+    return dict(hits=_hits,
+                misses=_misses,
+                hit_rate=_hits / float(lookups) if lookups else 0.0,
+                entries=len(_cache),
+                bytes=_bytes,
+                max_bytes=max_bytes)
+
+
+def clear():
+    global _bytes, _hits, _misses
+    _cache.clear()
+    _bytes = 0
+    _hits = _misses = 0
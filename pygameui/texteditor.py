@@ -0,0 +1,628 @@
+import bisect
+import collections
+
+import pygame
+
+import view
+import scroll
+import window
+import callback
+import animation
+import piecetable
+import textmetrics
+
+
+class TextEditor(view.View):
+    """Editable, word-wrapped, multi-line text of any length.
+
+    The text is kept in a piece table (see the piecetable module) and
+    wrapped by paragraph. Since a paragraph's line breaks depend on
+    nothing else, an edit only re-wraps the paragraphs it changed. As in
+    a TextView, only the lines in view are rendered, with the most
+    recently drawn ones cached, and an edit only redraws the lines that
+    changed or moved. Keystrokes thus take about as long in a document
+    of thousands of lines as in a short one.
+
+    Put it in a ScrollView; it keeps the cursor in view:
+
+        editor = TextEditor(pygame.Rect(0, 0, 400, 0), open(path).read())
+        scene.add_child(ScrollView(pygame.Rect(0, 0, 400, 300), editor))
+
+    The arrow keys, home, end, page up and page down move the cursor,
+    as does clicking. Ctrl-z undoes and ctrl-y (or ctrl-shift-z) redoes.
+    Undo history keeps the pieces each edit removed and inserted, not
+    copies of the text; consecutive typing or deleting is undone at once.
+
+    Layout sets the height of the view to fit all of the lines.
+
+    Signals
+
+        on_text_change(text_editor)
+
+    Style attributes
+
+        text_color, font, padding
+
+            As for a TextView.
+
+        blink_cursor, cursor_blink_duration
+
+            As for a TextField.
+
+    """
+
+    viewport_aware = True
+
+    # Maximum number of rendered lines kept.
+    max_cached_lines = 256
+
+    # Maximum number of edits that can be undone.
+    max_undo = 1000
+
+    # Spaces inserted by the tab key.
+    tab_size = 4
+
+    def __init__(self, frame, text=''):
+        view.View.__init__(self, frame)
+        self._set_text(text)
+        self._line_surfaces = collections.OrderedDict()     # text -> surface
+        self._cursor_on = True
+        self._blink_elapsed = 0
+        self.enabled = True
+        self.on_text_change = callback.Signal()
+
+    def _set_text(self, text):
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        self._table = piecetable.PieceTable(text)
+        self._lengths = [len(paragraph) for paragraph in text.split('\n')]
+        self._spans = None      # per paragraph, the (start, end) of lines
+        self._wrap_key = None
+        self._row_count = 0
+        # Where paragraphs start in the text, and the first line of each.
+        self._starts = _Offsets(lambda index: self._lengths[index] + 1,
+                                lambda: len(self._lengths))
+        self._first_rows = _Offsets(lambda index: len(self._spans[index]),
+                                    lambda: len(self._spans))
+        self._paragraph_cache = {}
+        self._cursor = 0
+        self._goal_x = None     # kept while moving up and down
+        self._undo = collections.deque(maxlen=self.max_undo)
+        self._redo = []
+        self._merging = False   # the next edit may join the last one
+
+    @property
+    def text(self):
+        return self._table.text
+
+    @text.setter
+    def text(self, text):
+        self._set_text(text)
+        if self.surface is not None:
+            self.layout()
+
+    @property
+    def cursor(self):
+        return self._cursor
+
+    @property
+    def line_count(self):
+        return self._row_count
+
+    @property
+    def line_height(self):
+        return self.font.get_linesize()
+
+    def paragraph(self, index):
+        """The text of a paragraph (a line of the text, unwrapped)."""
+        text = self._paragraph_cache.get(index)
+        if text is None:
+            if len(self._paragraph_cache) >= self.max_cached_lines:
+                self._paragraph_cache.clear()
+            start = self._start(index)
+            text = self._table.slice(start, start + self._lengths[index])
+            self._paragraph_cache[index] = text
+        return text
+
+    def layout(self):
+        self._wrap()
+        self.frame.h = (self._row_count * self.line_height +
+                        self.padding[1] * 2)
+        view.View.layout(self)
+
+    def _wrap(self):
+        key = (self.font, self.text_color,
+               self.frame.w - self.padding[0] * 2)
+        if key == self._wrap_key:
+            return
+        self._wrap_key = key
+        self._line_surfaces.clear()
+        paragraphs = self._table.text.split('\n')
+        self._lengths = [len(paragraph) for paragraph in paragraphs]
+        self._spans = [self._wrap_paragraph(paragraph)
+                       for paragraph in paragraphs]
+        self._row_count = sum(len(spans) for spans in self._spans)
+        self._starts.reset()
+        self._first_rows.reset()
+        self._paragraph_cache.clear()
+
+    def _wrap_paragraph(self, text):
+        width = self._wrap_key[2]
+        if textmetrics.size(self.font, text)[0] < width:
+            return [(0, len(text))]
+        # Skip the empty line a word too wide to fit gets broken before.
+        spans = [span for span in textmetrics.line_spans(self.font, text,
+                                                         width)
+                 if span[1] > span[0]]
+        for i in range(1, len(spans)):
+            # Leave the space a line was broken at at the end of the line
+            # before, so that the next one is not indented.
+            start, end = spans[i]
+            if text[start] == ' ' and end > start + 1:
+                spans[i - 1] = (spans[i - 1][0], start + 1)
+                spans[i] = (start + 1, end)
+        return spans or [(0, len(text))]
+
+    def _start(self, index):
+        """Where a paragraph starts in the text."""
+        return self._starts.get(index)
+
+    def _first_row(self, index):
+        """The first line of a paragraph."""
+        return self._first_rows.get(index)
+
+    def _paragraph_at(self, position):
+        """The index of the paragraph containing `position`."""
+        return self._starts.find(position)
+
+    def _paragraph_of_row(self, row):
+        return self._first_rows.find(row)
+
+    def _locate(self, position):
+        """The paragraph, line within it, and column of `position`."""
+        index = self._paragraph_at(position)
+        column = position - self._start(index)
+        spans = self._spans[index]
+        line = 0
+        while line + 1 < len(spans) and spans[line + 1][0] <= column:
+            line += 1
+        return index, line, column
+
+    def _cursor_rect(self):
+        index, line, column = self._locate(self._cursor)
+        start = self._spans[index][line][0]
+        text = self.paragraph(index)[start:column]
+        h = self.line_height
+        return pygame.Rect(
+            self.padding[0] + textmetrics.size(self.font, text)[0],
+            self.padding[1] + (self._first_row(index) + line) * h,
+            2, h)
+
+    def _position_at(self, x, row):
+        """The position nearest to `x` in a line."""
+        row = max(0, min(self._row_count - 1, row))
+        index = self._paragraph_of_row(row)
+        line = row - self._first_row(index)
+        spans = self._spans[index]
+        start, end = spans[line]
+        if line < len(spans) - 1 and end > start:
+            end -= 1    # the end of a line is the start of the next
+        text = self.paragraph(index)
+
+        # The first column at or past x.
+        x -= self.padding[0]
+        low, high = start, end
+        while low < high:
+            middle = (low + high) // 2
+            if textmetrics.size(self.font, text[start:middle])[0] < x:
+                low = middle + 1
+            else:
+                high = middle
+        if low > start:
+            before = textmetrics.size(self.font, text[start:low - 1])[0]
+            after = textmetrics.size(self.font, text[start:low])[0]
+            if x - before < after - x:
+                low -= 1
+        return self._start(index) + low
+
+    def insert(self, text):
+        """Insert `text` at the cursor."""
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        if len(text) > 0:
+            self._edit(self._cursor, 0, text)
+
+    def delete(self, forward=False):
+        """Delete the character before (or after) the cursor."""
+        if forward:
+            if self._cursor < len(self._table):
+                self._edit(self._cursor, 1, '')
+        elif self._cursor > 0:
+            self._edit(self._cursor - 1, 1, '')
+
+    def undo(self):
+        if len(self._undo) == 0:
+            return
+        edit = self._undo.pop()
+        position, removed, inserted = edit
+        self._redo.append(edit)
+        self._apply(position, _length(inserted), removed)
+
+    def redo(self):
+        if len(self._redo) == 0:
+            return
+        edit = self._redo.pop()
+        position, removed, inserted = edit
+        self._undo.append(edit)
+        self._apply(position, _length(removed), inserted)
+
+    def _edit(self, position, length, text):
+        damage = self._cursor_rect() if self._spans is not None else None
+        removed, inserted = self._replace(position, length, text=text)
+        self._record(position, removed, inserted, '\n' not in text)
+        self._cursor = position + len(text)
+        self._edited(damage)
+
+    def _apply(self, position, length, pieces):
+        damage = self._cursor_rect() if self._spans is not None else None
+        self._replace(position, length, pieces=pieces)
+        self._merging = False
+        self._cursor = position + _length(pieces)
+        self._edited(damage)
+
+    def _replace(self, position, length, text=None, pieces=None):
+        """Replace `length` characters at `position` with `text` or with
+        pieces of the piece table. Returns the pieces removed and those
+        inserted."""
+        if self._spans is not None:
+            first = self._paragraph_at(position)
+            last = self._paragraph_at(position + length)
+            before = self.paragraph(first)[:position - self._start(first)]
+            after = self.paragraph(last)[position + length -
+                                         self._start(last):]
+
+        removed = self._table.delete(position, length)
+        if pieces is None:
+            inserted = [self._table.insert(position, text)] if text else []
+        else:
+            self._table.insert_pieces(position, pieces)
+            inserted = pieces
+            text = self._table.pieces_text(pieces)
+
+        if self._spans is not None:
+            self._rewrap(first, last, (before + text + after).split('\n'))
+        return removed, inserted
+
+    def _rewrap(self, first, last, paragraphs):
+        """Replace paragraphs `first` to `last` with `paragraphs`."""
+        h = self.line_height
+        start = self._start(first)
+        first_row = self._first_row(first)
+        top = self.padding[1] + first_row * h
+        old_rows = sum(len(spans) for spans in self._spans[first:last + 1])
+        old_length = sum(self._lengths[first:last + 1]) + last - first
+
+        spans = [self._wrap_paragraph(paragraph) for paragraph in paragraphs]
+        rows = sum(len(paragraph_spans) for paragraph_spans in spans)
+        lengths = [len(paragraph) for paragraph in paragraphs]
+        self._spans[first:last + 1] = spans
+        self._lengths[first:last + 1] = lengths
+        self._row_count += rows - old_rows
+
+        starts = []
+        for length in lengths[:-1]:
+            start += length + 1
+            starts.append(start)
+        self._starts.replace(first, last, starts,
+                             sum(lengths) + len(lengths) - 1 - old_length)
+        first_rows = []
+        for paragraph_spans in spans[:-1]:
+            first_row += len(paragraph_spans)
+            first_rows.append(first_row)
+        self._first_rows.replace(first, last, first_rows, rows - old_rows)
+
+        if first == last and len(paragraphs) == 1:
+            self._paragraph_cache[first] = paragraphs[0]
+        else:
+            self._paragraph_cache.clear()
+
+        if rows == old_rows:
+            self.set_needs_display((0, top, self.frame.w, rows * h))
+        else:
+            # The lines below moved.
+            bottom = max(self.frame.h,
+                         self._row_count * h + self.padding[1] * 2)
+            self.set_needs_display((0, top, self.frame.w, bottom - top))
+
+    def _record(self, position, removed, inserted, mergeable):
+        self._redo = []
+        last = self._undo[-1] if len(self._undo) > 0 else None
+        if self._merging and mergeable and last is not None:
+            last_position, last_removed, last_inserted = last
+            if (not removed and not last_removed and
+                position == last_position + _length(last_inserted)):
+                # Typing on.
+                self._undo[-1] = (last_position, last_removed,
+                                  _joined(last_inserted, inserted))
+                return
+            if (not inserted and not last_inserted and
+                position + _length(removed) == last_position):
+                # Deleting backwards on.
+                self._undo[-1] = (position, _joined(removed, last_removed),
+                                  last_inserted)
+                return
+            if (not inserted and not last_inserted and
+                position == last_position):
+                # Deleting forwards on.
+                self._undo[-1] = (position, _joined(last_removed, removed),
+                                  last_inserted)
+                return
+        self._undo.append((position, removed, inserted))
+        self._merging = mergeable
+
+    def _edited(self, damage):
+        if self._spans is None:
+            # Not laid out yet; layout wraps the whole text.
+            self.on_text_change(self)
+            return
+
+        old_h = self.frame.h
+        self.frame.h = (self._row_count * self.line_height +
+                        self.padding[1] * 2)
+        if self.frame.h != old_h:
+            scroll_view = self.parent
+            if (isinstance(scroll_view, scroll.ScrollView) and
+                self.viewport is not None):
+                # Update the scrollbar, staying where we are.
+                scroll_view.scroll_to(-self.frame.top)
+            else:
+                self.layout()
+
+        self._goal_x = None
+        self._cursor_moved(damage)
+        self.on_text_change(self)
+
+    def move_cursor(self, position):
+        if self._spans is None:
+            return
+        damage = self._cursor_rect()
+        self._cursor = max(0, min(len(self._table), position))
+        self._goal_x = None
+        self._merging = False
+        self._cursor_moved(damage)
+
+    def _cursor_moved(self, damage):
+        self._blink_elapsed = 0
+        self._cursor_on = True
+        rect = self._cursor_rect()
+        if damage is not None:
+            self.set_needs_display(damage)
+        self.set_needs_display(rect)
+        if isinstance(self.parent, scroll.ScrollView):
+            self.parent.scroll_to_visible(rect)
+
+    def _move_vertically(self, rows):
+        rect = self._cursor_rect()
+        goal_x = self._goal_x if self._goal_x is not None else rect.left
+        row = (rect.top - self.padding[1]) // self.line_height + rows
+        if row < 0:
+            position = 0
+        elif row >= self._row_count:
+            position = len(self._table)
+        else:
+            position = self._position_at(goal_x, row)
+        self.move_cursor(position)
+        self._goal_x = goal_x
+
+    def _move_in_line(self, to_end):
+        index, line, column = self._locate(self._cursor)
+        spans = self._spans[index]
+        start, end = spans[line]
+        if to_end and line < len(spans) - 1 and end > start:
+            end -= 1
+        self.move_cursor(self._start(index) + (end if to_end else start))
+
+    def key_down(self, key, code):
+        mods = window.key_mods
+        if mods & pygame.KMOD_CTRL:
+            if key == pygame.K_z:
+                if mods & pygame.KMOD_SHIFT:
+                    self.redo()
+                else:
+                    self.undo()
+            elif key == pygame.K_y:
+                self.redo()
+            return
+
+        page_rows = 1
+        if self.parent is not None:
+            page_rows = max(1, self.parent.frame.h // self.line_height)
+
+        if key == pygame.K_BACKSPACE:
+            self.delete()
+        elif key == pygame.K_DELETE:
+            self.delete(forward=True)
+        elif key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            self.insert('\n')
+        elif key == pygame.K_TAB:
+            self.insert(' ' * self.tab_size)
+        elif key == pygame.K_LEFT:
+            self.move_cursor(self._cursor - 1)
+        elif key == pygame.K_RIGHT:
+            self.move_cursor(self._cursor + 1)
+        elif key == pygame.K_UP:
+            self._move_vertically(-1)
+        elif key == pygame.K_DOWN:
+            self._move_vertically(1)
+        elif key == pygame.K_PAGEUP:
+            self._move_vertically(-page_rows)
+        elif key == pygame.K_PAGEDOWN:
+            self._move_vertically(page_rows)
+        elif key == pygame.K_HOME:
+            self._move_in_line(to_end=False)
+        elif key == pygame.K_END:
+            self._move_in_line(to_end=True)
+        elif code:
+            try:
+                self.insert(str(code))
+            except UnicodeEncodeError:
+                pass
+
+    def mouse_down(self, button, point):
+        if self._spans is not None:
+            row = (point[1] - self.padding[1]) // self.line_height
+            self.move_cursor(self._position_at(point[0], row))
+        view.View.mouse_down(self, button, point)
+
+    def update(self, dt):
+        view.View.update(self, dt)
+        if self.blink_cursor and self.has_focus():
+            self._blink_elapsed += int(round(dt * 1000))
+            duration = self.cursor_blink_duration
+            cursor_on = self._blink_elapsed // duration % 2 == 0
+            if cursor_on != self._cursor_on:
+                self._cursor_on = cursor_on
+                self.set_needs_display(self._cursor_rect())
+            until_blink = duration - self._blink_elapsed % duration
+            animation.wake_after(self, until_blink / 1000.0)
+
+    def _line_surface(self, text):
+        surfaces = self._line_surfaces
+        surface = surfaces.pop(text, None)
+        if surface is None:
+            surface = self.font.render(text, True, self.text_color)
+            while len(surfaces) >= self.max_cached_lines:
+                surfaces.popitem(last=False)
+        surfaces[text] = surface    # most recently used last
+        return surface
+
+    def draw(self):
+        if not view.View.draw(self):
+            return False
+
+        # Only the lines in the area being redrawn, which is at most the
+        # visible part (see View.set_viewport).
+        ox, oy = self.surface_origin()
+        area = self.surface.get_clip().move(ox, oy)
+        h = self.line_height
+        x = self.padding[0] - ox
+        top = self.padding[1] - oy
+        row = max(0, (area.top - self.padding[1]) // h)
+        last = min(self._row_count,
+                   (area.bottom - self.padding[1] - 1) // h + 1)
+
+        while row < last:
+            index = self._paragraph_of_row(row)
+            text = self.paragraph(index)
+            line = row - self._first_row(index)
+            for start, end in self._spans[index][line:]:
+                if row >= last:
+                    break
+                if end > start:
+                    self.surface.blit(self._line_surface(text[start:end]),
+                                      (x, top + row * h))
+                row += 1
+
+        if self.has_focus() and (not self.blink_cursor or self._cursor_on):
+            self.surface.fill(self.text_color,
+                              self._cursor_rect().move(-ox, -oy))
+        return True
+
+
+class _Offsets(object):
+    """Where each paragraph starts, in characters or in lines.
+
+    Only the first entries are known; more are worked out from the sizes
+    of the paragraphs as they are needed. An edit moves all the entries
+    after it by the same amount, which is noted once and added to each
+    entry when it is next looked at, so an edit near the start of a long
+    text costs no more than one near its end.
+    """
+
+    def __init__(self, size_of, count):
+        self._size_of = size_of     # index -> distance to the next entry
+        self._count = count         # () -> number of paragraphs
+        self.reset()
+
+    def reset(self):
+        """Forget all but the first entry."""
+        self._entries = [0]
+        # Entries from _moved_from on are short by _moved_by.
+        self._moved_from = 1
+        self._moved_by = 0
+
+    def get(self, index):
+        entries = self._entries
+        if index >= len(entries):
+            self._settle(len(entries))
+            while len(entries) <= index:
+                i = len(entries) - 1
+                entries.append(entries[i] + self._size_of(i))
+            self._moved_from = len(entries)
+        if index >= self._moved_from:
+            return entries[index] + self._moved_by
+        return entries[index]
+
+    def find(self, value):
+        """The index of the last entry not past `value`."""
+        entries, count = self._entries, self._count()
+        while len(entries) < count:
+            i = len(entries) - 1
+            if self.get(i) + self._size_of(i) > value:
+                break
+            self.get(i + 1)
+        moved_from, moved_by = self._moved_from, self._moved_by
+        if (moved_from < len(entries) and
+            value >= entries[moved_from] + moved_by):
+            return bisect.bisect_right(entries, value - moved_by,
+                                       moved_from) - 1
+        return bisect.bisect_right(entries, value, 0, moved_from) - 1
+
+    def replace(self, first, last, entries, delta):
+        """Replace the entries after `first` up to `last` with `entries`,
+        and move those after them by `delta`."""
+        known = self._entries
+        self._settle(last + 1)
+        if len(known) <= last + 1:
+            del known[first + 1:]
+            known.extend(entries)
+            self._moved_from = len(known)
+            self._moved_by = 0
+            return
+        if self._moved_by == 0:
+            self._moved_from = last + 1
+        moved_from, moved_by = self._moved_from, self._moved_by
+        # Those not yet moved join the ones that are, to be moved again.
+        known[last + 1:moved_from] = [entry - moved_by for entry
+                                      in known[last + 1:moved_from]]
+        known[first + 1:last + 1] = entries
+        self._moved_from = first + 1 + len(entries)
+        self._moved_by = moved_by + delta
+
+    def _settle(self, end):
+        """Move the entries before `end` that are still to be moved."""
+        entries = self._entries
+        end = min(end, len(entries))
+        start = self._moved_from
+        if start < end:
+            moved_by = self._moved_by
+            entries[start:end] = [entry + moved_by
+                                  for entry in entries[start:end]]
+            self._moved_from = end
+        if self._moved_from >= len(entries):
+            self._moved_by = 0
+
+
+def _length(pieces):
+    return sum(piece[2] for piece in pieces)
+
+
+def _joined(pieces, more):
+    """`pieces` followed by `more`, with adjacent pieces merged."""
+    pieces = list(pieces)
+    for piece in more:
+        if pieces:
+            buffer, start, length = pieces[-1]
+            if buffer == piece[0] and start + length == piece[1]:
+                pieces[-1] = (buffer, start, length + piece[2])
+                continue
+        pieces.append(piece)
+    return pieces
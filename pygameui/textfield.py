@@ -1,101 +1,430 @@
+import bisect
+
 import pygame
 
 import view
 import label
+import window
 import callback
+import animation
+import textmetrics
+
+
+class GapBuffer(object):
+    """Text that is cheap to edit at a cursor.
+
+    The characters before the cursor are kept in order and those after
+    it in reverse order, so inserting or deleting at the cursor and
+    moving the cursor by a few characters take constant time however
+    long the text is.
+    """
+
+    def __init__(self, text=''):
+        self._before = list(text)
+        self._after = []
+        self._text = text
+
+    def __len__(self):
+        return len(self._before) + len(self._after)
+
+    def __getitem__(self, index):
+        """The character at `index`, without putting the text together."""
+        if index < 0:
+            index += len(self)
+        if index < len(self._before):
+            return self._before[index]
+        return self._after[len(self) - 1 - index]
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = (''.join(self._before) +
+                          ''.join(reversed(self._after)))
+        return self._text
+
+    @property
+    def cursor(self):
+        return len(self._before)
+
+    def move_to(self, position):
+        position = max(0, min(len(self), position))
+        before, after = self._before, self._after
+        if position < len(before):
+            after.extend(reversed(before[position:]))
+            del before[position:]
+        elif position > len(before):
+            count = position - len(before)
+            before.extend(reversed(after[-count:]))
+            del after[-count:]
+
+    def insert(self, text):
+        """Insert `text` before the cursor."""
+        self._before.extend(text)
+        self._text = None
+
+    def delete_before(self, count=1):
+        count = min(count, len(self._before))
+        if count > 0:
+            del self._before[-count:]
+            self._text = None
+
+    def delete_after(self, count=1):
+        count = min(count, len(self._after))
+        if count > 0:
+            del self._after[-count:]
+            self._text = None
 
 
 class TextField(view.View):
     """Editable single line of text.
 
-    There are no fancy keybindings; just backspace.
+    The cursor is moved with the arrow keys, home and end, or by
+    clicking; with shift held, moving it selects text. Backspace and
+    delete remove the selection or a character; typing replaces the
+    selection.
 
     Signals
 
         on_text_change(text_field, text)
         on_return(text_field, text)
 
+    Style attributes
+
+        selection_color
+
+            Multiplied into the selected text and its background.
+
     """
 
     def __init__(self, frame, text='', placeholder=''):
         view.View.__init__(self, frame)
 
-        self.text = text or ''
+        self._buffer = GapBuffer(text or '')
+        self._anchor = None     # where the selection started
+        self._starts = []       # x of each character of the shown text
+        self._starts_font = None
+        self._placeholder_shown = True
         self.placeholder = placeholder
 
         self.label = label.Label(pygame.Rect((0, 0), frame.size),
                                  text or placeholder)
         self.label.halign = label.LEFT
+        # The text changes often; compose it from cached glyphs and edit
+        # it in place (see Label.replace_text).
+        self.label.use_glyph_atlas = True
         self.add_child(self.label)
 
         self.enabled = True
         self.max_len = None
         self.secure = False
+        self._cursor_on = True
+        self._blink_elapsed = 0
 
         self.on_return = callback.Signal()
         self.on_text_change = callback.Signal()
 
+    @property
+    def text(self):
+        return self._buffer.text
+
+    @text.setter
+    def text(self, text):
+        self._replace(0, len(self._buffer), text)
+
+    @property
+    def cursor(self):
+        return self._buffer.cursor
+
+    @property
+    def selection(self):
+        """The (start, end) of the selected text, or None."""
+        if self._anchor is None or self._anchor == self.cursor:
+            return None
+        return (min(self._anchor, self.cursor),
+                max(self._anchor, self.cursor))
+
+    @property
+    def selected_text(self):
+        selection = self.selection
+        if selection is None:
+            return ''
+        return self.text[selection[0]:selection[1]]
+
+    def move_cursor(self, position, select=False):
+        """Move the cursor, selecting the text passed over if `select`."""
+        damage = self._cursor_damage()
+        if select:
+            if self._anchor is None:
+                self._anchor = self.cursor
+        else:
+            self._anchor = None
+        self._buffer.move_to(position)
+        self._blink_elapsed = 0
+        self._cursor_on = True
+        # The label redraws itself if the text scrolls.
+        self._scroll_to_cursor()
+        self.set_needs_display(damage.union(self._cursor_damage()))
+
+    def select_all(self):
+        self.move_cursor(0)
+        self.move_cursor(len(self._buffer), select=True)
+
+    def insert(self, text):
+        """Replace the selection, if any, with `text` at the cursor."""
+        start, end = self.selection or (self.cursor, self.cursor)
+        if self.max_len:
+            text = text[:max(0, self.max_len - len(self._buffer) +
+                                end - start)]
+        if len(text) == 0 and start == end:
+            return
+        self._replace(start, end, text)
+        self._notify_text_change()
+
+    def delete(self, forward=False):
+        """Delete the selection, or the character before the cursor."""
+        selection = self.selection
+        if selection is None:
+            cursor = self.cursor
+            if forward:
+                selection = (cursor, min(cursor + 1, len(self._buffer)))
+            else:
+                selection = (max(0, cursor - 1), cursor)
+            if selection[0] == selection[1]:
+                return
+        self._replace(selection[0], selection[1], '')
+        self._notify_text_change()
+
+    def _notify_text_change(self):
+        # Putting the text together for every keystroke is only worth it
+        # when someone listens.
+        if self.on_text_change.slots:
+            self.on_text_change(self, self.text)
+
+    def _replace(self, start, end, text):
+        """Replace the text from `start` to `end`; the cursor goes after.
+
+        Only what changed is shown again: the label edits its text in
+        place, and the characters before `start` keep their positions.
+        """
+        laid_out = self.surface is not None
+        if laid_out:
+            damage = self._cursor_damage()
+        self._anchor = None
+        self._buffer.move_to(end)
+        self._buffer.delete_before(end - start)
+        self._buffer.insert(text)
+        del self._starts[start:]
+        if not laid_out:
+            return
+        self._update_text((start, end, text))
+        self._scroll_to_cursor()
+        self._blink_elapsed = 0
+        self._cursor_on = True
+        self.set_needs_display(damage.union(self._cursor_damage()))
+
     def layout(self):
-        self.label.topleft = self.padding
-        r_before = self.label.frame.right
-        self.label.frame.w = self.frame.w - self.padding[0] * 2
+        self.label.frame.top = self.padding[1]
         self.label.frame.h = self.frame.h - self.padding[1] * 2
-        self.label.frame.right = r_before
         self._update_text()
+        self._scroll_to_cursor()
         view.View.layout(self)
 
     def key_down(self, key, code):
+        select = bool(window.key_mods & pygame.KMOD_SHIFT)
+        selection = self.selection
+
         if key == pygame.K_BACKSPACE:
-            self.text = self.text[0:-1]
+            self.delete()
+        elif key == pygame.K_DELETE:
+            self.delete(forward=True)
+        elif key == pygame.K_LEFT:
+            if selection is not None and not select:
+                self.move_cursor(selection[0])
+            else:
+                self.move_cursor(self.cursor - 1, select)
+        elif key == pygame.K_RIGHT:
+            if selection is not None and not select:
+                self.move_cursor(selection[1])
+            else:
+                self.move_cursor(self.cursor + 1, select)
+        elif key == pygame.K_HOME:
+            self.move_cursor(0, select)
+        elif key == pygame.K_END:
+            self.move_cursor(len(self._buffer), select)
+        elif key == pygame.K_a and window.key_mods & pygame.KMOD_CTRL:
+            self.select_all()
         elif key == pygame.K_RETURN:
             can_submit = True
             if self.placeholder and self.text == self.placeholder:
                 can_submit = False
             if can_submit:
                 self.on_return(self, self.text)
-        else:
+        elif code:
             try:
-                self.text = '%s%s' % (self.text, str(code))
-            except:
+                self.insert(str(code))
+            except UnicodeEncodeError:
                 pass
-            self.on_text_change(self, self.text)
 
-        if self.max_len:
-            self.text = self.text[0:self.max_len]
+    def mouse_down(self, button, point):
+        select = bool(window.key_mods & pygame.KMOD_SHIFT)
+        x = point[0] - self.label.frame.left - self.label.padding[0]
+        self.move_cursor(self._position_at(x), select)
+        view.View.mouse_down(self, button, point)
 
-        self._update_text()
-        self.label.shrink_wrap()
-        self.label.layout()
+    def _shown_text(self):
+        if self.secure:
+            return '*' * len(self._buffer)
+        return self.text
+
+    def _update_text(self, edit=None):
+        """Show the text, or the placeholder, in the label.
 
-        if self.label.frame.right > self.frame.w - self.padding[0] * 2:
-            self.label.frame.right = self.frame.w - self.padding[0] * 2
+        `edit` is the (start, end, text) just replaced; if the label
+        was showing the text, just that part of it is changed.
+        """
+        placeholder = (len(self._buffer) == 0 and
+                       self.placeholder is not None and
+                       not self.has_focus())
+        if placeholder:
+            text_color = self.placeholder_text_color
         else:
-            self.label.frame.left = self.padding[0]
-
-    def _update_text(self):
-        if (len(self.text) == 0 and
-            self.placeholder is not None and
-            not self.has_focus()):
-            self.label.text_color = self.placeholder_text_color
-            self.label.text = self.placeholder
-        elif len(self.text) >= 0:
-            self.label.text_color = self.text_color
-            self.label.text = self.text
-        elif self.secure:
-            self.label.text = '*' * len(self.text)
+            text_color = self.text_color
+        label = self.label
+        if label.text_color != text_color:
+            label.text_color = text_color
+            label.render()
+
+        if (edit is not None and not placeholder and
+            not self._placeholder_shown):
+            start, end, text = edit
+            if self.secure:
+                text = '*' * len(text)
+            label.replace_text(start, end, text)
+            return
+
+        self._placeholder_shown = placeholder
+        text = self.placeholder if placeholder else self._shown_text()
+        if label.text != text:
+            label.replace_text(0, len(label.text or ''), text)
+
+    def _shown_char(self, index):
+        if self.secure:
+            return '*'
+        return self._buffer[index]
+
+    def _cursor_x(self, position):
+        """Where the character at `position` starts in the shown text."""
+        length = len(self._buffer)
+        if position == 0 or length == 0:
+            return 0
+
+        font = self.label.font
+        if font is not self._starts_font:
+            self._starts_font = font
+            self._starts = []
+        starts = self._starts
+        if len(starts) == 0:
+            starts.append(0)
+        char = self._shown_char
+        while len(starts) < min(position + 1, length):
+            i = len(starts)
+            starts.append(starts[i - 1] +
+                          textmetrics.advance(font, char(i - 1), char(i)))
+
+        if position >= length:
+            return starts[-1] + textmetrics.size(font, char(-1))[0]
+        return starts[position]
+
+    def _position_at(self, x):
+        """The cursor position nearest to `x` in the shown text."""
+        end = self._cursor_x(len(self._buffer))
+        if x >= end:
+            return len(self._buffer)
+        position = bisect.bisect(self._starts, x)
+        if position == 0:
+            return 0
+        left = self._starts[position - 1]
+        right = (self._starts[position] if position < len(self._starts)
+                 else end)
+        return position if x - left > right - x else position - 1
+
+    def _scroll_to_cursor(self):
+        """Keep the cursor inside the field. Returns whether it scrolled.
+
+        The label is as wide as its text, or the field if wider, but
+        only the part of it inside the field is drawn (see
+        View.set_viewport).
+        """
+        label = self.label
+        inside = self.frame.w - self.padding[0] * 2
+        label.frame.w = max(inside,
+                            label.text_size[0] + label.padding[0] * 2)
+        right = self.frame.w - self.padding[0]
+        x = label.padding[0] + self._cursor_x(self.cursor)
+        left = label.frame.left
+        if left + x + label.padding[0] > right:
+            left = right - x - label.padding[0]
+        if left + x - label.padding[0] < self.padding[0]:
+            left = self.padding[0] - x + label.padding[0]
+        left = min(self.padding[0], max(left, right - label.frame.w))
+        scrolled = left != label.frame.left
+        label.frame.left = left
+        label.set_viewport(pygame.Rect(self.padding[0] - left, 0,
+                                       inside, label.frame.h))
+        return scrolled
+
+    def _cursor_rect(self):
+        return pygame.Rect(
+            (self.label.frame.left + self.label.padding[0] +
+             self._cursor_x(self.cursor)),
+            self.label.frame.bottom - self.label.padding[1],
+            10, 2)
+
+    def _selection_rect(self):
+        selection = self.selection
+        if selection is None:
+            return None
+        left = self.label.frame.left + self.label.padding[0]
+        x1 = left + self._cursor_x(selection[0])
+        x2 = left + self._cursor_x(selection[1])
+        return pygame.Rect(x1, self.label.frame.top + self.label.padding[1],
+                           x2 - x1,
+                           self.label.frame.h - self.label.padding[1] * 2)
+
+    def _cursor_damage(self):
+        """The area the cursor and selection are drawn in."""
+        damage = self._cursor_rect()
+        selection_rect = self._selection_rect()
+        if selection_rect is not None:
+            damage.union_ip(selection_rect)
+        return damage
+
+    def update(self, dt):
+        view.View.update(self, dt)
+        if self.blink_cursor and self.has_focus():
+            # Timed by dt, not the wall clock, so that frames stepped
+            # with a synthetic clock (see pygameui.step) are repeatable.
+            self._blink_elapsed += int(round(dt * 1000))
+            duration = self.cursor_blink_duration
+            cursor_on = self._blink_elapsed // duration % 2 == 0
+            if cursor_on != self._cursor_on:
+                self._cursor_on = cursor_on
+                self.set_needs_display(self._cursor_rect())
+            until_blink = duration - self._blink_elapsed % duration
+            animation.wake_after(self, until_blink / 1000.0)
 
     def draw(self):
         if not view.View.draw(self) or not self.has_focus():
             return False
 
-        if (not self.blink_cursor or
-            pygame.time.get_ticks() / self.cursor_blink_duration % 2 == 0):
-            size = self.label.font.size(self.text)
-            rect = pygame.Rect(
-                self.label.frame.left + self.label.padding[0] + size[0],
-                self.label.frame.bottom - self.label.padding[1],
-                10, 2)
-            pygame.draw.rect(self.surface, self.text_color, rect)
+        selection_rect = self._selection_rect()
+        if selection_rect is not None:
+            self.surface.fill(self.selection_color, selection_rect,
+                              pygame.BLEND_RGB_MULT)
+
+        if not self.blink_cursor or self._cursor_on:
+            pygame.draw.rect(self.surface, self.text_color,
+                             self._cursor_rect())
         return True
 
     def __repr__(self):
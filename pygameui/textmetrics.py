@@ -0,0 +1,136 @@
+"""Measure text without rendering it.
+
+Text sizes are cached per font, so laying out the same words again (e.g.
+re-wrapping a label) does not measure them again. `measure` tells how
+text would be broken into lines and how large it would be, without
+creating any surfaces:
+
+    lines, (w, h) = textmetrics.measure(font, text, 200,
+                                        textmetrics.WORD_WRAP)
+
+"""
+
+import re
+
+
+WORD_WRAP = 0
+CLIP = 1
+
+# Maximum number of text sizes cached per font, and the length of the
+# longest text whose size is cached. When a font's cache is full, its
+# least recently used quarter is dropped.
+max_cached_sizes = 8192
+max_cached_length = 256
+
+_sizes = {}     # font -> {text: [(w, h), last use]}
+_advances = {}  # font -> {(char, next char): pixels}
+_uses = 0
+
+
+def size(font, text):
+    """Like font.size(text), but cached."""
+    if len(text) > max_cached_length:
+        return font.size(text)
+    global _uses
+    sizes = _sizes.get(font)
+    if sizes is None:
+        sizes = _sizes[font] = {}
+    _uses += 1
+    entry = sizes.get(text)
+    if entry is None:
+        if len(sizes) >= max_cached_sizes:
+            _evict(sizes)
+        entry = sizes[text] = [font.size(text), _uses]
+    else:
+        entry[1] = _uses
+    return entry[0]
+
+
+def _evict(sizes):
+    # Stamping each use and sorting once in a while is much cheaper on
+    # this hot path than moving entries within an OrderedDict.
+    by_use = sorted(sizes.iteritems(), key=lambda item: item[1][1])
+    for text, _ in by_use[:max(1, len(by_use) // 4)]:
+        del sizes[text]
+
+
+def advance(font, char, next_char):
+    """Pixels from the start of `char` to the start of `next_char`.
+
+    Summing the advances of the characters of a string gives where each
+    of them starts, kerning included.
+    """
+    advances = _advances.get(font)
+    if advances is None:
+        advances = _advances[font] = {}
+    pair = (char, next_char)
+    try:
+        return advances[pair]
+    except KeyError:
+        result = advances[pair] = (font.size(char + next_char)[0] -
+                                   font.size(next_char)[0])
+        return result
+
+
+def measure(font, text, width=None, wrap_mode=CLIP):
+    """How `text` would be laid out in lines at most `width` wide.
+
+    With CLIP the text is a single line and `width` is not used. With
+    WORD_WRAP it is broken at whitespace and newlines.
+
+    Returns (lines, (w, h)): the lines without surrounding whitespace,
+    and the size of the rendered lines stacked together.
+    """
+    if text is None or len(text) == 0:
+        return [], (0, 0)
+
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if wrap_mode == WORD_WRAP:
+        lines = wrap(font, text, width)
+    else:
+        lines = [re.sub(r'[\n\t]{2,}', ' ', text).strip()]
+
+    w, h = 0, 0
+    for line in lines:
+        line_w, line_h = size(font, line)
+        w = max(w, line_w)
+        h += line_h
+    return lines, (w, h)
+
+
+def wrap(font, text, width):
+    """Break `text` into lines narrower than `width` at whitespace."""
+    return [text[start:end].strip()
+            for start, end in line_spans(font, text, width)]
+
+
+def line_spans(font, text, width):
+    """Where `wrap` breaks `text`, as the (start, end) of each line."""
+    spans = []
+    start = position = 0
+    line_width = 0
+
+    for token in re.split(r'(\s)', text):
+        if len(token) == 0:
+            continue
+
+        token_width = size(font, token)[0]
+
+        if token == '\n' or token_width + line_width >= width:
+            spans.append((start, position))
+            if token == '\n':
+                start, line_width = position + 1, 0
+            else:
+                start, line_width = position, token_width
+        else:
+            line_width += token_width
+        position += len(token)
+
+    if position > start:
+        spans.append((start, position))
+    return spans
+
+
+def clear():
+    _sizes.clear()
+    _advances.clear()
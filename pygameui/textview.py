@@ -0,0 +1,150 @@
+import collections
+
+import view
+import textmetrics
+
+
+class TextView(view.View):
+    """Read-only, word-wrapped text of any length.
+
+    Unlike a Label, a TextView does not render its text up front. The
+    text is wrapped once (again only when the width or font changes)
+    into the offsets of its lines, and only the lines in view are
+    rendered, keeping the most recently drawn ones cached. Memory and
+    drawing time thus do not depend on the length of the text. Put it in
+    a ScrollView to show long documents:
+
+        text_view = TextView(pygame.Rect(0, 0, 400, 0), open(path).read())
+        scene.add_child(ScrollView(pygame.Rect(0, 0, 400, 300), text_view))
+
+    Layout sets the height of the view to fit all of the lines. After
+    changing the text, lay out the view (or its scroll view) again.
+
+    Style attributes:
+
+        text_color
+
+            The color of the text.
+
+        font
+
+            The font used for rendering the text.
+
+        padding
+
+            Horizontal and vertical spacing from the view's
+            interior edges where text is rendered.
+
+    """
+
+    viewport_aware = True
+
+    # Maximum number of rendered lines kept.
+    max_cached_lines = 256
+
+    def __init__(self, frame, text=''):
+        view.View.__init__(self, frame)
+        self._text = _normalize(text)
+        self._spans = []        # (start, end) in the text of each line
+        self._wrapped_key = None
+        self._line_surfaces = collections.OrderedDict()     # key -> surface
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        self._text = _normalize(text)
+        self._wrapped_key = None
+        self.set_needs_display()
+
+    @property
+    def line_count(self):
+        return len(self._spans)
+
+    @property
+    def line_height(self):
+        return self.font.get_linesize()
+
+    def line(self, index):
+        """The text of a wrapped line."""
+        start, end = self._spans[index]
+        return self._text[start:end].strip()
+
+    def layout(self):
+        self._wrap()
+        self.frame.h = (self.line_count * self.line_height +
+                        self.padding[1] * 2)
+        view.View.layout(self)
+
+    def _wrap(self):
+        width = self.frame.w - self.padding[0] * 2
+        key = (self._text, self.font, self.text_color, width)
+        if key == self._wrapped_key:
+            return
+        self._wrapped_key = key
+        self._line_surfaces.clear()
+        self._spans = self._line_spans(self._text, width)
+
+    def _line_spans(self, text, width):
+        # Paragraphs that fit are not broken into words.
+        font = self.font
+        spans = []
+        start = 0
+        for paragraph in text.split('\n'):
+            end = start + len(paragraph)
+            if font.size(paragraph)[0] < width:
+                spans.append((start, end))
+            else:
+                # Skip the empty line a word too wide to fit gets
+                # broken before.
+                spans.extend((start + line_start, start + line_end)
+                             for line_start, line_end in
+                             textmetrics.line_spans(font, paragraph, width)
+                             if line_end > line_start)
+            start = end + 1
+        return spans
+
+    def lines_in(self, rect):
+        """The range of indexes of the lines that intersect `rect`."""
+        h = self.line_height
+        top = self.padding[1]
+        first = max(0, (rect.top - top) // h)
+        last = min(self.line_count, (rect.bottom - top - 1) // h + 1)
+        return range(first, max(first, last))
+
+    def _line_surface(self, index):
+        surfaces = self._line_surfaces
+        key = self._line_key(index)
+        surface = surfaces.pop(key, None)
+        if surface is None:
+            surface = self.font.render(self.line(index), True,
+                                       self.text_color)
+            while len(surfaces) >= self.max_cached_lines:
+                surfaces.popitem(last=False)
+        surfaces[key] = surface     # most recently used last
+        return surface
+
+    def _line_key(self, index):
+        # What the rendered line is cached under.
+        return index
+
+    def draw(self):
+        if not view.View.draw(self):
+            return False
+
+        # Only the lines in the visible part (see View.set_viewport).
+        visible = self._visible_rect()
+        ox, oy = visible.topleft
+        x = self.padding[0] - ox
+        top = self.padding[1] - oy
+        h = self.line_height
+        for index in self.lines_in(visible):
+            self.surface.blit(self._line_surface(index), (x, top + index * h))
+
+        return True
+
+
+def _normalize(text):
+    return text.replace('\r\n', '\n').replace('\r', '\n')
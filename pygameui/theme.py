@@ -90,7 +90,7 @@ class Theme(object):
 
             The value of the style attribute; colors are either
             a 3-tuple for RGB, a 4-tuple for RGBA, or a pair
-            thereof for a linear gradient.
+            (or longer sequence) thereof for a linear gradient.
 
         """
         self._styles.setdefault(class_name, {}).setdefault(state, {})
@@ -497,6 +497,10 @@ def init_light_theme():
                     state='normal',
                     key='blink_cursor',
                     value=True)
+    light_theme.set(class_name='TextField',
+                    state='normal',
+                    key='selection_color',
+                    value=(160, 200, 255))
     light_theme.set(class_name='TextField',
                     state='normal',
                     key='cursor_blink_duration',
@@ -511,6 +515,89 @@ def init_light_theme():
                     key='line_color',
                     value=color6)
 
+    light_theme.set(class_name='TextView',
+                    state='normal',
+                    key='background_color',
+                    value=color4)
+    light_theme.set(class_name='TextView',
+                    state='normal',
+                    key='text_color',
+                    value=color8)
+    light_theme.set(class_name='TextView',
+                    state='normal',
+                    key='font',
+                    value=resource.get_font(14))
+    light_theme.set(class_name='TextView',
+                    state='normal',
+                    key='padding',
+                    value=(6, 6))
+
+    light_theme.set(class_name='TextEditor',
+                    state='normal',
+                    key='background_color',
+                    value=color4)
+    light_theme.set(class_name='TextEditor',
+                    state='focused',
+                    key='background_color',
+                    value=color4)
+    light_theme.set(class_name='TextEditor',
+                    state='normal',
+                    key='text_color',
+                    value=color9)
+    light_theme.set(class_name='TextEditor',
+                    state='normal',
+                    key='font',
+                    value=resource.get_font(14))
+    light_theme.set(class_name='TextEditor',
+                    state='normal',
+                    key='padding',
+                    value=(6, 6))
+    light_theme.set(class_name='TextEditor',
+                    state='normal',
+                    key='blink_cursor',
+                    value=True)
+    light_theme.set(class_name='TextEditor',
+                    state='normal',
+                    key='cursor_blink_duration',
+                    value=450)
+
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='background_color',
+                    value=(0, 0, 0, 160))
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='phase_colors',
+                    value=(violet_color,    # events
+                           blue_color,      # update
+                           green_color,     # draw
+                           yellow_color,    # blit
+                           orange_color))   # flip
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='budget_color',
+                    value=red_color)
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='stats_label.background_color',
+                    value=clear_color)
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='stats_label.text_color',
+                    value=color4)
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='stats_label.text_shadow_offset',
+                    value=None)
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='stats_label.font',
+                    value=resource.get_font(12))
+    light_theme.set(class_name='PerfHUDView',
+                    state='normal',
+                    key='stats_label.padding',
+                    value=(4, 2))
+
 
 def init_dark_theme():
     # TODO
@@ -0,0 +1,93 @@
+"""A cache of rendered tiles of a large view.
+
+A view too large to draw in full every time it scrolls (a map, a big
+grid, a long document) can be drawn in fixed-size tiles instead. Tiles
+are rendered when first scrolled into view, kept in a least recently
+used cache with a memory budget, and reused when the view scrolls back.
+A tile is only rendered again when the area it covers changes.
+
+Use it through `ScrollView(frame, content_view, tiled=True)`, or set a
+view's `tile_cache` to a `TileCache` of your own.
+
+"""
+
+import collections
+
+import pygame
+
+import surfaces
+
+
+TILE_SIZE = (256, 256)
+
+
+class TileCache(object):
+    """Rendered tiles of a view keyed by (column, row)."""
+
+    def __init__(self, tile_size=TILE_SIZE, max_bytes=16 * 1024 * 1024):
+        self.tile_size = tile_size
+        self.max_bytes = max_bytes
+        self._tiles = collections.OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def tile_rect(self, key, bounds):
+        """The area, in view coordinates, covered by tile `key`."""
+        w, h = self.tile_size
+        rect = pygame.Rect(key[0] * w, key[1] * h, w, h)
+        return rect.clip(bounds)
+
+    def keys_in(self, rect):
+        """Keys of the tiles overlapping `rect`."""
+        w, h = self.tile_size
+        if rect.w <= 0 or rect.h <= 0:
+            return []
+        return [(col, row)
+                for row in range(rect.top // h, (rect.bottom - 1) // h + 1)
+                for col in range(rect.left // w, (rect.right - 1) // w + 1)]
+
+    def get(self, key):
+        """The tile surface for `key`, or None if it is not cached."""
+        tile = self._tiles.pop(key, None)
+        if tile is None:
+            self.misses += 1
+            return None
+        self._tiles[key] = tile   # most recently used last
+        self.hits += 1
+        return tile
+
+    def put(self, key, tile):
+        """Cache a tile surface obtained from `surfaces.acquire`."""
+        self._discard(key)
+        self._tiles[key] = tile
+        self._bytes += surfaces.surface_bytes(tile)
+        while self._bytes > self.max_bytes and len(self._tiles) > 1:
+            old_key = next(iter(self._tiles))
+            self._discard(old_key)
+            self.evictions += 1
+
+    def invalidate(self, rect):
+        """Forget the tiles overlapping `rect` (in view coordinates)."""
+        for key in self.keys_in(pygame.Rect(rect)):
+            self._discard(key)
+
+    def clear(self):
+        for key in self._tiles.keys():
+            self._discard(key)
+
+    def info(self):
+        """Cache counters and memory use as a dict."""
+        return dict(tiles=len(self._tiles),
+                    bytes=self._bytes,
+                    max_bytes=self.max_bytes,
+                    hits=self.hits,
+                    misses=self.misses,
+                    evictions=self.evictions)
+
+    def _discard(self, key):
+        tile = self._tiles.pop(key, None)
+        if tile is not None:
+            self._bytes -= surfaces.surface_bytes(tile)
+            surfaces.release(tile)
@@ -1,10 +1,11 @@
 import pygame
 
+import animation
 import render
 import theme
 import callback
-import resource
 import focus
+import surfaces
 
 import kvc
 
@@ -40,6 +41,19 @@ class View(object):
 
     """
 
+    # Can the view be drawn straight into another surface by the flat
+    # compositor? Views whose draw replaces their surface cannot.
+    flattenable = True
+
+    # Does this class's draw honor `viewport`? See `set_viewport`.
+    viewport_aware = True
+
+    # Does draw paint over the view's children? None assumes it does if
+    # the class overrides draw. Set to False in classes whose drawing
+    # never overlaps their children, so the flat compositor can draw
+    # them in place with their children instead of isolating them.
+    draws_over_children = None
+
     def __init__(self, frame=None):
         self.frame = frame
 
@@ -51,7 +65,20 @@ class View(object):
         self.hidden = False
         self.draggable = False
 
+        self.surface = None
         self.shadow_image = None
+        self._backing_surface = None
+        self.viewport = None
+        self.tile_cache = None
+
+        self._dirty = True
+        self._damage = []
+        self._drawn_rect = None
+        self._drawn_hidden = True
+        self._shifted = False
+        self._viewport_moved = False
+        self._drawing_flat = False
+        self._flat = False
 
         self.on_focused = callback.Signal()
         self.on_blurred = callback.Signal()
@@ -77,18 +104,133 @@ class View(object):
         Subclasses should invoke this after laying out child
         views and/or updating its own frame.
         """
+        if self.viewport is not None:
+            self._set_surface_size(self.viewport.size)
+        else:
+            self._set_surface_size(self.frame.size)
         if self.shadowed:
             shadow_size = theme.current.shadow_size
             shadowed_frame_size = (self.frame.w + shadow_size,
                                    self.frame.h + shadow_size)
-            self.surface = pygame.Surface(
-                shadowed_frame_size, pygame.SRCALPHA, 32)
-            shadow_image = resource.get_image('shadow')
-            self.shadow_image = resource.scale_image(shadow_image,
-                                                     shadowed_frame_size)
+            self.shadow_image = render.get_shadow(shadowed_frame_size,
+                                                  shadow_size)
         else:
-            self.surface = pygame.Surface(self.frame.size, pygame.SRCALPHA, 32)
             self.shadow_image = None
+        self.set_needs_display()
+
+    def _set_surface_size(self, size):
+        """Give the view a cleared backing surface of the given size.
+
+        The current surface is reused when it already has that size;
+        otherwise it goes back to the surface pool. Opaque views get a
+        surface without per-pixel alpha.
+        """
+        alpha = not self.is_opaque()
+        surface = self._backing_surface
+        if (surface is not None and surface.get_size() == tuple(size) and
+            surfaces.is_alpha(surface) == alpha):
+            surface.fill((0, 0, 0, 0))
+        else:
+            self._release_surface()
+            surface = surfaces.acquire(size, alpha)
+            self._backing_surface = surface
+        self.surface = surface
+
+    def is_opaque(self):
+        """Does the view's background cover its whole frame with no alpha?
+
+        Views with an opaque background do not need per-pixel alpha in
+        their backing surface.
+        """
+        color = getattr(self, 'background_color', None)
+        if color is None:
+            return False
+        if render.is_gradient(color):
+            stops = color
+        else:
+            stops = [color]
+        return all(len(stop) == 3 or stop[3] == 255 for stop in stops)
+
+    def can_draw_viewport(self):
+        """Can the view draw just a part of itself?
+
+        See `set_viewport`. Views that override `draw` support this by
+        setting `viewport_aware` to True in their class and drawing
+        relative to `surface_origin()`.
+        """
+        for klass in type(self).__mro__:
+            if 'draw' in vars(klass):
+                return vars(klass).get('viewport_aware', False)
+        return False
+
+    def set_viewport(self, rect):
+        """Only draw the `rect` part (in local coordinates) of the view.
+
+        The backing surface then only covers `rect`, and children outside
+        it are neither refreshed nor drawn. This is how a ScrollView
+        avoids drawing the parts of its content that are scrolled out of
+        view. None draws the whole view again.
+
+        When only the position of the viewport changes, the pixels still
+        visible are moved within the surface and just the newly exposed
+        strips are drawn.
+        """
+        if rect is not None:
+            rect = pygame.Rect(rect)
+        if rect == self.viewport:
+            return
+
+        old = self._visible_rect()
+        self.viewport = rect
+        new = self._visible_rect()
+        if self.surface is None:
+            return
+        if new.size != old.size:
+            self._set_surface_size(new.size)
+            self.set_needs_display()
+        elif self.tile_cache is not None:
+            self._viewport_moved = True
+        elif self._dirty or not new.colliderect(old):
+            self.set_needs_display()
+        else:
+            self._shift_surface(old, new)
+
+    def _shift_surface(self, old, new):
+        """Move the pixels of viewport `old` to where they are in `new`."""
+        dx, dy = old.left - new.left, old.top - new.top
+        self.surface.scroll(dx, dy)
+        if dy > 0:
+            self._damage.append(pygame.Rect(new.left, new.top, new.w, dy))
+        elif dy < 0:
+            self._damage.append(pygame.Rect(new.left, new.bottom + dy,
+                                            new.w, -dy))
+        if dx > 0:
+            self._damage.append(pygame.Rect(new.left, new.top, dx, new.h))
+        elif dx < 0:
+            self._damage.append(pygame.Rect(new.right + dx, new.top,
+                                            -dx, new.h))
+        self._shifted = True
+
+    def surface_origin(self):
+        """The point in local coordinates drawn at the surface's top-left."""
+        if self.viewport is None:
+            return (0, 0)
+        return self.viewport.topleft
+
+    def surface_size(self):
+        if self.viewport is None:
+            return self.frame.size
+        return self.viewport.size
+
+    def _visible_rect(self):
+        """The part of the view, in local coordinates, that is drawn."""
+        return pygame.Rect(self.surface_origin(), self.surface_size())
+
+    def _release_surface(self):
+        if self._backing_surface is not None:
+            surfaces.release(self._backing_surface)
+            self._backing_surface = None
+            self.surface = None
 
     def size_to_fit(self):
         rect = self.frame
@@ -226,21 +368,211 @@ class View(object):
             kvc.set_value_for_keypath(self, key, val, preserve_child)
         self.layout()
 
+    def set_needs_display(self, rect=None):
+        """Mark all of this view, or just `rect` of it, as needing a redraw.
+
+        Views are retained: they are only redrawn when something about
+        them changed. Changes to `frame` and `hidden` are detected
+        automatically; call this after changing anything else that
+        affects how the view draws itself. `rect` is in local
+        coordinates.
+        """
+        if rect is None:
+            self._dirty = True
+        else:
+            self._damage.append(pygame.Rect(rect))
+
+    def refresh(self):
+        """Redraw this view and its children where needed.
+
+        Returns the list of changed areas of the view's surface in local
+        coordinates; the list is empty if nothing changed.
+
+        Do not call directly.
+        """
+        if self.surface is None:
+            # Released when the view was orphaned, and not laid out since
+            # it was added again.
+            self._set_surface_size(self.surface_size())
+            self._dirty = True
+
+        if self.tile_cache is not None and self.viewport is not None:
+            return self._refresh_tiled()
+
+        damage = self._collect_damage()
+        if damage:
+            damage = self._redraw(damage)
+        if self._shifted:
+            # All of the surface moved, not just the redrawn strips.
+            self._shifted = False
+            damage = [self._visible_rect()]
+        return damage
+
+    def _collect_damage(self):
+        """Refresh the children and gather what changed in this view."""
+        damage, self._damage = self._damage, []
+        viewport = self.viewport
+        for child in self.children:
+            if child.hidden or (viewport is not None and
+                                not viewport.colliderect(child.frame)):
+                if not child._drawn_hidden:
+                    damage.append(child._drawn_rect)
+                    child._drawn_hidden = True
+                continue
+            child_damage = child.refresh()
+            rect = child._composited_rect()
+            if child._drawn_hidden or rect != child._drawn_rect:
+                if not child._drawn_hidden:
+                    damage.append(child._drawn_rect)
+                damage.append(rect)
+            else:
+                damage.extend(r.move(child.frame.topleft)
+                              for r in child_damage)
+            child._drawn_rect = rect
+            child._drawn_hidden = False
+        if self._dirty:
+            damage = [self._visible_rect()]
+        return damage
+
+    def _redraw(self, damage):
+        """Redraw the part of the surface covered by `damage`.
+
+        Returns the damage actually redrawn.
+        """
+        surface = self._backing_surface
+        if (surface is not None and surface is self.surface and
+            surfaces.is_alpha(surface) == self.is_opaque()):
+            # The background was restyled without a relayout.
+            self._set_surface_size(surface.get_size())
+            damage = [self._visible_rect()]
+
+        ox, oy = self.surface_origin()
+        clip = damage[0].unionall(damage[1:]).move(-ox, -oy)
+        surface = self.surface
+        surface.set_clip(clip)
+        self.draw()
+        surface.set_clip(None)
+        self._dirty = False
+        return damage
+
+    def _refresh_tiled(self):
+        """Refresh a view drawn through its `tile_cache`.
+
+        Every child is refreshed, since changes outside the viewport
+        make cached tiles stale. Tiles overlapping changed areas are
+        dropped, and the viewport is copied from the tiles, rendering
+        those missing.
+        """
+        cache = self.tile_cache
+        dirty = self._dirty
+        viewport, self.viewport = self.viewport, None
+        try:
+            damage = self._collect_damage()
+        finally:
+            self.viewport = viewport
+        self._dirty = False
+
+        surface = self._backing_surface
+        if surfaces.is_alpha(surface) == self.is_opaque():
+            # The background was restyled without a relayout.
+            self._set_surface_size(surface.get_size())
+            dirty = True
+
+        visible = self._visible_rect()
+        if dirty:
+            cache.clear()
+        else:
+            for rect in damage:
+                cache.invalidate(rect)
+
+        if dirty or self._viewport_moved:
+            self._viewport_moved = False
+            damage = [visible]
+        else:
+            damage = [rect.clip(visible) for rect in damage
+                      if rect.colliderect(visible)]
+        if damage:
+            self._draw_tiles(damage[0].unionall(damage[1:]))
+        return damage
+
+    def _draw_tiles(self, area):
+        """Copy the tiles covering `area` onto the surface."""
+        ox, oy = self.surface_origin()
+        bounds = pygame.Rect((0, 0), self.frame.size)
+        clip = area.move(-ox, -oy)
+        self.surface.set_clip(clip)
+        if surfaces.is_alpha(self.surface):
+            self.surface.fill((0, 0, 0, 0))
+        for key in self.tile_cache.keys_in(area):
+            rect = self.tile_cache.tile_rect(key, bounds)
+            tile = self.tile_cache.get(key)
+            if tile is None:
+                tile = self._render_tile(rect)
+                self.tile_cache.put(key, tile)
+            self.surface.blit(tile, (rect.left - ox, rect.top - oy))
+        self.surface.set_clip(None)
+
+    def _render_tile(self, rect):
+        tile = surfaces.acquire(rect.size, not self.is_opaque())
+        surface, viewport = self.surface, self.viewport
+        self.surface, self.viewport = tile, rect
+        try:
+            self.draw()
+        finally:
+            self.surface, self.viewport = surface, viewport
+        return tile
+
+    def _composited_rect(self):
+        """The area, in parent coordinates, this view draws onto its parent."""
+        if self.viewport is not None:
+            return self.viewport.move(self.frame.topleft)
+
+        if self.surface is None:
+            rect = pygame.Rect(self.frame)     # not drawn since orphaned
+        else:
+            rect = pygame.Rect(self.frame.topleft, self.surface.get_size())
+            rect.union_ip(self.frame)
+        if self.shadowed:
+            shadow_size = theme.current.shadow_size
+            rect.union_ip(pygame.Rect(
+                self.frame.left - shadow_size // 2,
+                self.frame.top - shadow_size // 2,
+                self.frame.w + shadow_size,
+                self.frame.h + shadow_size))
+        return rect
+
     def draw(self):
-        """Do not call directly."""
+        """Do not call directly.
+
+        Draws the view's background, its children's current surfaces,
+        shadows and borders. Children are brought up to date by
+        `refresh` beforehand. When the flat compositor draws the view
+        straight into the window, the children are drawn separately.
+        """
 
         if self.hidden:
             return False
 
+        ox, oy = self.surface_origin()
+
         if self.background_color is not None:
-            render.fillrect(self.surface, self.background_color,
-                            rect=pygame.Rect((0, 0), self.frame.size))
+            rect = pygame.Rect((-ox, -oy), self.frame.size)
+            if self._drawing_flat and not self.is_opaque():
+                # Drawing onto what is behind the view, not a clear surface.
+                render.blend_rect(self.surface, self.background_color, rect)
+            else:
+                render.fillrect(self.surface, self.background_color, rect)
 
-        for child in self.children:
-            if not child.hidden:
-                child.draw()
+        if not self._drawing_flat:
+            for child in self.children:
+                if child.hidden:
+                    continue
+                if (self.viewport is not None and
+                    not self.viewport.colliderect(child.frame)):
+                    continue
 
-                topleft = child.frame.topleft
+                frame = child.frame.move(-ox, -oy)
+                topleft = frame.topleft
 
                 if child.shadowed:
                     shadow_size = theme.current.shadow_size
@@ -248,35 +580,40 @@ class View(object):
                                       topleft[1] - shadow_size // 2)
                     self.surface.blit(child.shadow_image, shadow_topleft)
 
-                self.surface.blit(child.surface, topleft)
-
-                if child.border_color and child.border_widths is not None:
-                    if (type(child.border_widths) is int and
-                        child.border_widths > 0):
-                        pygame.draw.rect(self.surface, child.border_color,
-                                         child.frame, child.border_widths)
-                    else:
-                        tw, lw, bw, rw = child.get_border_widths()
-
-                        tl = (child.frame.left, child.frame.top)
-                        tr = (child.frame.right - 1, child.frame.top)
-                        bl = (child.frame.left, child.frame.bottom - 1)
-                        br = (child.frame.right - 1, child.frame.bottom - 1)
-
-                        if tw > 0:
-                            pygame.draw.line(self.surface, child.border_color,
-                                             tl, tr, tw)
-                        if lw > 0:
-                            pygame.draw.line(self.surface, child.border_color,
-                                             tl, bl, lw)
-                        if bw > 0:
-                            pygame.draw.line(self.surface, child.border_color,
-                                             bl, br, bw)
-                        if rw > 0:
-                            pygame.draw.line(self.surface, child.border_color,
-                                             tr, br, rw)
+                cx, cy = child.surface_origin()
+                self.surface.blit(child.surface,
+                                  (topleft[0] + cx, topleft[1] + cy))
+                child.draw_border(self.surface, frame)
         return True
 
+    def draw_border(self, surface, rect):
+        """Draw this view's border onto `surface` around `rect`.
+
+        Borders are drawn by the parent view after the view itself.
+        """
+        if not self.border_color or self.border_widths is None:
+            return
+
+        if type(self.border_widths) is int and self.border_widths > 0:
+            pygame.draw.rect(surface, self.border_color,
+                             rect, self.border_widths)
+        else:
+            tw, lw, bw, rw = self.get_border_widths()
+
+            tl = (rect.left, rect.top)
+            tr = (rect.right - 1, rect.top)
+            bl = (rect.left, rect.bottom - 1)
+            br = (rect.right - 1, rect.bottom - 1)
+
+            if tw > 0:
+                pygame.draw.line(surface, self.border_color, tl, tr, tw)
+            if lw > 0:
+                pygame.draw.line(surface, self.border_color, tl, bl, lw)
+            if bw > 0:
+                pygame.draw.line(surface, self.border_color, bl, br, bw)
+            if rw > 0:
+                pygame.draw.line(surface, self.border_color, tr, br, rw)
+
     def get_border_widths(self):
         """Return border width for each side top, left, bottom, right."""
         if type(self.border_widths) is int:   # uniform size
@@ -322,6 +659,9 @@ class View(object):
             if ch == child:
                 ch.orphaned()
                 del self.children[index]
+                if not ch._drawn_hidden:
+                    self.set_needs_display(ch._drawn_rect)
+                    ch._drawn_hidden = True
                 break
 
     def rm(self):
@@ -332,6 +672,16 @@ class View(object):
         self.on_parented()
 
     def orphaned(self):
+        # The view is laid out again when it is next added to a scene, or
+        # gets new surfaces when next refreshed, so its surfaces may go
+        # back to the pool until then.
+        for view in [self] + list(self.iter_descendants()):
+            # Views out of the scene are not updated, so should not keep
+            # the run loop ticking either.
+            animation.stop(view)
+            view._release_surface()
+            if view.tile_cache is not None:
+                view.tile_cache.clear()
         self.on_orphaned()
 
     def iter_ancestors(self):
@@ -344,6 +694,12 @@ class View(object):
         for child in self.children:
             yield child
 
+    def iter_descendants(self):
+        for child in self.children:
+            yield child
+            for descendant in child.iter_descendants():
+                yield descendant
+
     def bring_to_front(self):
         """TODO: explain depth sorting"""
         if self.parent is not None:
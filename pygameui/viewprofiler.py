@@ -0,0 +1,178 @@
+"""Find out which views are slow to draw, lay out or stylize.
+
+    viewprofiler.enable()
+    ...   # use the app
+    viewprofiler.disable()
+    print viewprofiler.table()
+
+While enabled, every call to `draw`, `layout` and `stylize` of a view is
+timed. Calls are aggregated per view class and per view path such as
+'KitchenSinkScene/AlertView[0]/message_label'. A path element is the name of
+the parent's attribute that holds the view, or the view's class name and
+index among its siblings.
+
+Total time includes the time spent in other profiled calls made by the
+call (e.g. a stylize that lays out its children); self time does not.
+A view calling the same method of its base class (e.g. Label.draw calling
+View.draw) counts as one call. Times are in milliseconds.
+
+The methods are only wrapped while the profiler is enabled, so it costs
+nothing otherwise. View classes defined after `enable` is called are not
+profiled.
+
+"""
+
+import json
+import timeit
+import weakref
+
+import view
+
+
+METHODS = ('draw', 'layout', 'stylize')
+
+CLASS = 'class'
+PATH = 'path'
+
+_clock = timeit.default_timer
+
+_originals = []         # (class, method name, function)
+_stack = []             # [view, method name, time in profiled callees]
+_stats = {CLASS: {}, PATH: {}}   # (key, method) -> [calls, total, self]
+_names = weakref.WeakKeyDictionary()    # view -> (parent, name)
+
+
+def enable():
+    if is_enabled():
+        return
+    for klass in _view_classes():
+        for name in METHODS:
+            func = vars(klass).get(name)
+            if func is not None:
+                _originals.append((klass, name, func))
+                setattr(klass, name, _profiled(name, func))
+
+
+def disable():
+    while len(_originals) > 0:
+        klass, name, func = _originals.pop()
+        setattr(klass, name, func)
+    del _stack[:]
+
+
+def is_enabled():
+    return len(_originals) > 0
+
+
+def reset():
+    for stats in _stats.itervalues():
+        stats.clear()
+    _names.clear()
+
+
+def _view_classes():
+    classes, pending = [], [view.View]
+    while len(pending) > 0:
+        klass = pending.pop()
+        classes.append(klass)
+        pending.extend(klass.__subclasses__())
+    return classes
+
+
+def _profiled(name, func):
+    def wrapper(self, *args, **kwargs):
+        if len(_stack) > 0 and _stack[-1][:2] == [self, name]:
+            return func(self, *args, **kwargs)
+
+        entry = [self, name, 0.0]
+        _stack.append(entry)
+        start = _clock()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = (_clock() - start) * 1000
+            _stack.pop()
+            if len(_stack) > 0:
+                _stack[-1][2] += elapsed
+            _record(self, name, elapsed, elapsed - entry[2])
+
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _record(a_view, name, total, self_time):
+    for kind, key in ((CLASS, type(a_view).__name__),
+                      (PATH, _path(a_view))):
+        stats = _stats[kind].get((key, name))
+        if stats is None:
+            _stats[kind][(key, name)] = [1, total, self_time]
+        else:
+            stats[0] += 1
+            stats[1] += total
+            stats[2] += self_time
+
+
+def _path(a_view):
+    names = []
+    while a_view.parent is not None:
+        names.append(_name_in_parent(a_view))
+        a_view = a_view.parent
+    names.append(type(a_view).__name__)
+    return '/'.join(reversed(names))
+
+
+def _name_in_parent(a_view):
+    parent = a_view.parent
+    cached = _names.get(a_view)
+    if cached is not None and cached[0] is parent:
+        return cached[1]
+    name = _find_name(a_view, parent)
+    _names[a_view] = (parent, name)
+    return name
+
+
+def _find_name(a_view, parent):
+    for attr, value in vars(parent).iteritems():
+        if value is a_view and attr != 'parent':
+            return attr
+    class_name = type(a_view).__name__
+    siblings = [child for child in parent.children
+                if type(child).__name__ == class_name]
+    return '%s[%d]' % (class_name, siblings.index(a_view))
+
+
+def stats(by=CLASS, sort='self'):
+    """Aggregated timings as a list of dicts, slowest first.
+
+    `by` is CLASS or PATH; `sort` is 'self', 'total' or 'calls'.
+    """
+    rows = [dict(key=key, method=name, calls=calls,
+                 total=total, self=self_time)
+            for (key, name), (calls, total, self_time)
+            in _stats[by].iteritems()]
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows
+
+
+def table(by=CLASS, sort='self', limit=None):
+    """The timings as a text table, slowest first."""
+    rows = stats(by, sort)
+    if limit is not None:
+        rows = rows[:limit]
+    width = max([len(by)] + [len(row['key']) for row in rows])
+    line = '%-*s  %-8s %8s %11s %11s %10s'
+    lines = [line % (width, by, 'method', 'calls', 'total ms', 'self ms',
+                     'avg ms')]
+    for row in rows:
+        lines.append('%-*s  %-8s %8d %11.2f %11.2f %10.3f' % (
+            width, row['key'], row['method'], row['calls'],
+            row['total'], row['self'], row['total'] / row['calls']))
+    return '\n'.join(lines)
+
+
+def to_json(sort='self'):
+    """The timings per class and per path as a JSON string."""
+    return json.dumps({CLASS: stats(CLASS, sort), PATH: stats(PATH, sort)},
+                      indent=2, sort_keys=True)
@@ -1 +1,6 @@
 rect = None
+
+# Modifier keys held (pygame.KMOD_* flags) as of the last key event
+# dispatched. Unlike pygame.key.get_mods(), this follows replayed and
+# synthetic events too.
+key_mods = 0
@@ -37,7 +37,7 @@ setup(
     install_requires=['setuptools', 'pygame>=1.9.1'],
     packages=['pygameui'],
     package_data={'pygameui': ['resources/*/*']},
-    scripts=['bin/pygameui-kitchensink.py'],
+    scripts=['bin/pygameui-kitchensink.py', 'bin/pygameui-benchmark.py'],
     description='GUI framework for Pygame',
     keywords="UI GUI Pygame button scrollbar progress slider user interface",
     license='MIT',
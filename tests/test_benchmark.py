@@ -0,0 +1,32 @@
+import unittest
+
+from pygameui import benchmark
+
+
+def results(fps, p95):
+    return dict(results=[dict(name='labels', fps=fps,
+                              frame_ms=dict(p95=p95))])
+
+
+class CompareTest(unittest.TestCase):
+
+    def row(self, old, new):
+        header, row = benchmark.compare(old, new).split('\n')
+        return row.split()
+
+    def test_ratios(self):
+        self.assertEqual(self.row(results(50.0, 20.0), results(100.0, 10.0)),
+                         ['labels', '50.0', '100.0', '2.00',
+                          '20.00', '10.00', '2.00'])
+
+    def test_missing_fps(self):
+        self.assertEqual(self.row(results(None, 20.0), results(100.0, 0)),
+                         ['labels', '-', '100.0', '0.00',
+                          '20.00', '0.00', '0.00'])
+        self.assertEqual(self.row(results(0.0, 20.0), results(None, 10.0)),
+                         ['labels', '0.0', '-', '0.00',
+                          '20.00', '10.00', '2.00'])
+
+
+if __name__ == '__main__':
+    unittest.main()
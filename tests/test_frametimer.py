@@ -0,0 +1,65 @@
+import unittest
+
+from pygameui import frametimer
+
+
+class FrameTimerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.clock = frametimer._clock
+        frametimer._clock = lambda: self.now
+        frametimer.set_history(10)
+
+    def tearDown(self):
+        frametimer._clock = self.clock
+        frametimer.set_history(300)
+
+    def frame(self, draw_ms, other_ms=1):
+        frametimer.begin_frame()
+        self.now += other_ms / 1000.0
+        frametimer.lap(frametimer.UPDATE)
+        self.now += draw_ms / 1000.0
+        frametimer.lap(frametimer.DRAW)
+        frametimer.end_frame()
+
+    def test_percentiles_of(self):
+        times = range(1, 101)
+        self.assertEqual(frametimer.percentiles_of(times),
+                         {'p50': 50, 'p95': 95, 'p99': 99, 'max': 100})
+        self.assertEqual(frametimer.percentiles_of([7], (50, 90)),
+                         {'p50': 7, 'p90': 7, 'max': 7})
+        self.assertEqual(frametimer.percentiles_of([]), {})
+
+    def test_phases_are_timed(self):
+        self.frame(4)
+        frame, = frametimer.frames()
+        self.assertAlmostEqual(frame[frametimer.DRAW], 4)
+        self.assertAlmostEqual(frame[frametimer.UPDATE], 1)
+        self.assertAlmostEqual(frame[frametimer.TOTAL], 5)
+        self.assertEqual(frame[frametimer.BLIT], 0)
+
+    def test_only_recent_frames_are_kept(self):
+        for draw_ms in range(1, 16):
+            self.frame(draw_ms)
+        draws = [frame[frametimer.DRAW] for frame in frametimer.frames()]
+        self.assertEqual([round(ms) for ms in draws], range(6, 16))
+
+        result = frametimer.percentiles(frametimer.DRAW)
+        self.assertAlmostEqual(result['p50'], 10)
+        self.assertAlmostEqual(result['max'], 15)
+        self.assertEqual(sorted(frametimer.summary()),
+                         sorted(frametimer.PHASE_NAMES))
+
+    def test_disabled(self):
+        frametimer.enabled = False
+        try:
+            self.frame(4)
+        finally:
+            frametimer.enabled = True
+        self.assertEqual(frametimer.frames(), [])
+        self.assertEqual(frametimer.percentiles(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import random
+import unittest
+
+import pygame
+
+import pygameui
+from pygameui import glyphs, render, resource
+
+
+BLACK = (0, 0, 0)
+
+
+def setUpModule():
+    pygameui.init('test', (320, 240), headless=True)
+
+
+def pixels(surface):
+    return surface.get_size(), pygame.image.tostring(surface, 'RGBA')
+
+
+class GlyphAtlasTest(unittest.TestCase):
+
+    def setUp(self):
+        glyphs.clear()
+        self.font = resource.get_font(16)
+
+    def tearDown(self):
+        glyphs.clear()
+
+    def test_glyphs_are_rendered_once(self):
+        atlas = glyphs.get_atlas(self.font, True, BLACK)
+        atlas.render('abba')
+        page, rect = atlas.glyph('a')
+        atlas.render('cab')
+        self.assertEqual(atlas.glyph('a'), (page, rect))
+        self.assertEqual(len(atlas.pages), 1)
+        self.assertEqual(rect.size,
+                         self.font.render('a', True, BLACK).get_size())
+
+    def test_render_places_glyphs_by_advance(self):
+        surface = glyphs.render(self.font, 'hello', True, BLACK)
+        atlas = glyphs.get_atlas(self.font, True, BLACK)
+        width = sum(atlas.advance(a, b) for a, b in zip('hell', 'ello'))
+        width += self.font.size('o')[0]
+        self.assertEqual(surface.get_size(),
+                         (width, self.font.size('hello')[1]))
+        self.assertEqual(glyphs.render(self.font, '', True, BLACK).get_width(),
+                         0)
+
+    def test_least_recently_used_atlas_is_dropped(self):
+        max_atlases = glyphs.max_atlases
+        glyphs.max_atlases = 2
+        try:
+            red = glyphs.get_atlas(self.font, True, (255, 0, 0))
+            green = glyphs.get_atlas(self.font, True, (0, 255, 0))
+            self.assertTrue(glyphs.get_atlas(self.font, True,
+                                             (255, 0, 0)) is red)
+            glyphs.get_atlas(self.font, True, (0, 0, 255))
+            self.assertTrue(glyphs.get_atlas(self.font, True,
+                                             (255, 0, 0)) is red)
+            self.assertFalse(glyphs.get_atlas(self.font, True,
+                                              (0, 255, 0)) is green)
+        finally:
+            glyphs.max_atlases = max_atlases
+
+
+class GlyphLineTest(unittest.TestCase):
+
+    def setUp(self):
+        glyphs.clear()
+        self.atlas = glyphs.get_atlas(resource.get_font(16), True, BLACK)
+
+    def tearDown(self):
+        glyphs.clear()
+
+    def check_edits(self, shadow_color=None, shadow_offset=None):
+        rng = random.Random(7)
+        text = 'Hello'
+        line = glyphs.GlyphLine(self.atlas, text, shadow_color,
+                                shadow_offset)
+        for _ in range(40):
+            start = rng.randint(0, len(text))
+            end = min(len(text), start + rng.choice([0, 0, 1, 3]))
+            chars = ''.join(rng.choice('aWij .fT_')
+                            for _ in range(rng.choice([0, 1, 2, 5])))
+            text = text[:start] + chars + text[end:]
+            line.replace(start, end, chars)
+            self.assertEqual(line.text, text)
+
+            expected = self.atlas.render(text)
+            self.assertEqual(pixels(line.text_surface), pixels(expected))
+            if shadow_offset is not None:
+                expected = render.shadowed(expected, shadow_color,
+                                           shadow_offset)
+                self.assertEqual(pixels(line.surface), pixels(expected))
+
+    def test_edits_match_a_full_render(self):
+        self.check_edits()
+
+    def test_edits_match_a_full_render_with_a_shadow(self):
+        self.check_edits((200, 50, 50), (0, 1))
+        self.check_edits((200, 50, 50), (-2, 1))
+
+    def test_replace_returns_the_changed_span(self):
+        line = glyphs.GlyphLine(self.atlas, 'abcdef')
+        start = line.starts[3]
+        left, right = line.replace(3, 4, 'WW')
+        self.assertTrue(left <= start)
+        self.assertTrue(right >= line.starts[5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import random
+import unittest
+
+from pygameui import piecetable
+from pygameui.piecetable import PieceTable
+
+
+class PieceTableTest(unittest.TestCase):
+
+    def setUp(self):
+        # Small blocks so that they are split and dropped often.
+        self.block_size = piecetable.BLOCK_SIZE
+        piecetable.BLOCK_SIZE = 2
+
+    def tearDown(self):
+        piecetable.BLOCK_SIZE = self.block_size
+
+    def check(self, table, text):
+        self.assertEqual(len(table), len(text))
+        self.assertEqual(table.text, text)
+        starts = [0]
+        for length in table._block_lengths[:-1]:
+            starts.append(starts[-1] + length)
+        self.assertEqual(table._block_starts, starts[:len(table._blocks)])
+        for block, length in zip(table._blocks, table._block_lengths):
+            self.assertTrue(0 < len(block) <= 2 * piecetable.BLOCK_SIZE)
+            self.assertEqual(sum(piece[2] for piece in block), length)
+
+    def test_edits(self):
+        table = PieceTable('hello world')
+        table.insert(5, ',')
+        self.assertEqual(table.text, 'hello, world')
+        removed = table.delete(0, 5)
+        self.assertEqual(table.pieces_text(removed), 'hello')
+        self.assertEqual(table.text, ', world')
+        table.insert_pieces(0, removed)
+        self.check(table, 'hello, world')
+
+    def test_typing_makes_one_piece(self):
+        table = PieceTable('ab')
+        for i, char in enumerate('xyz'):
+            table.insert(1 + i, char)
+        self.assertEqual(table.text, 'axyzb')
+        self.assertEqual(table.piece_count(), 3)
+
+    def test_delete_past_the_end(self):
+        table = PieceTable('hello')
+        removed = table.delete(3, 10)
+        self.assertEqual(table.pieces_text(removed), 'lo')
+        self.check(table, 'hel')
+
+    def test_random_edits_and_undo(self):
+        rng = random.Random(5)
+        table = PieceTable('hello world, this is the original')
+        text = table.text
+        undo = []
+        for _ in range(1000):
+            r = rng.random()
+            if r < 0.5:
+                position = rng.randint(0, len(text))
+                chars = ''.join(rng.choice('abc\n')
+                                for _ in range(rng.randint(1, 4)))
+                table.insert(position, chars)
+                text = text[:position] + chars + text[position:]
+            elif r < 0.8 and text:
+                position = rng.randint(0, len(text) - 1)
+                length = rng.randint(1, 8)
+                removed = table.delete(position, length)
+                self.assertEqual(table.pieces_text(removed),
+                                 text[position:position + length])
+                text = text[:position] + text[position + length:]
+                undo.append((position, removed))
+            elif undo:
+                position, removed = undo.pop()
+                if position <= len(text):
+                    table.insert_pieces(position, removed)
+                    text = (text[:position] + table.pieces_text(removed) +
+                            text[position:])
+            self.assertEqual(len(table), len(text))
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, len(text))
+            self.assertEqual(table.slice(start, end), text[start:end])
+        self.check(table, text)
+        self.assertTrue(len(table._blocks) > 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
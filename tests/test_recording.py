@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+import pygameui
+from pygameui import focus, recording, scene, window
+
+
+def setUpModule():
+    pygameui.init('test', (320, 240), headless=True)
+
+
+class InputLog(pygameui.Scene):
+    """A scene noting the frame each key and click arrives in."""
+
+    def __init__(self):
+        pygameui.Scene.__init__(self)
+        self.frames = 0
+        self.keys = []
+        self.clicks = []
+        self.add_child(Target(pygame.Rect(0, 0, 100, 100)))
+
+    def update(self, dt):
+        pygameui.Scene.update(self, dt)
+        self.frames += 1
+
+    def key_down(self, key, code):
+        self.keys.append((self.frames, key, code, window.key_mods))
+
+
+class Target(pygameui.View):
+    """Clicked views get the focus, and with it the keys."""
+
+    def key_down(self, key, code):
+        self.parent.key_down(key, code)
+
+    def mouse_down(self, button, point):
+        self.parent.clicks.append((self.parent.frames, button, tuple(point)))
+
+
+class RecordingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'session.events')
+        focus.set(None)
+
+    def tearDown(self):
+        recording.stop()
+        while len(scene.stack) > 0:
+            scene.pop()
+        shutil.rmtree(self.directory)
+
+    def key(self, key, code, mod=0):
+        return pygame.event.Event(pygame.KEYDOWN, key=key, unicode=code,
+                                  mod=mod)
+
+    def record(self):
+        recorded = InputLog()
+        scene.push(recorded)
+        recording.start(self.path)
+        pygameui.step(3)
+        pygameui.step(1, events=[self.key(pygame.K_a, u'a')])
+        pygameui.step(2)
+        pygameui.step(1, events=[
+            self.key(pygame.K_b, u'B', pygame.KMOD_LSHIFT),
+            pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1,
+                               pos=(10, 20))])
+        pygameui.step(1, events=[self.key(pygame.K_a, u'',
+                                          pygame.KMOD_LCTRL)])
+        recording.stop()
+        scene.pop()
+        return recorded
+
+    def test_replay_dispatches_events_in_the_same_frames(self):
+        recorded = self.record()
+        self.assertEqual(recorded.keys,
+                         [(3, pygame.K_a, u'a', 0),
+                          (6, pygame.K_b, u'B', pygame.KMOD_LSHIFT),
+                          (7, pygame.K_a, u'', pygame.KMOD_LCTRL)])
+        self.assertEqual(recorded.clicks, [(6, 1, (10, 20))])
+
+        replayed = InputLog()
+        scene.push(replayed)
+        frames = recording.replay(self.path)
+        self.assertEqual(frames, 8)
+        self.assertEqual(replayed.keys, recorded.keys)
+        self.assertEqual(replayed.clicks, recorded.clicks)
+
+    def test_replayed_modifier_keys_select_text(self):
+        def session():
+            page = pygameui.Scene()
+            field = pygameui.TextField(pygame.Rect(0, 0, 200, 30))
+            page.add_child(field)
+            scene.push(page)
+            focus.set(field)
+            return field
+
+        shift = pygame.KMOD_LSHIFT
+        events = [self.key(pygame.K_a, u'a'), self.key(pygame.K_b, u'b'),
+                  self.key(pygame.K_c, u'c'),
+                  self.key(pygame.K_LEFT, u'', shift),
+                  self.key(pygame.K_LEFT, u'', shift)]
+        session()
+        recording.start(self.path)
+        for event in events:
+            pygameui.step(1, events=[event])
+        recording.stop()
+        scene.pop()
+
+        field = session()
+        recording.replay(self.path)
+        self.assertEqual(field.text, 'abc')
+        self.assertEqual(field.selection, (1, 3))
+        self.assertEqual(field.selected_text, 'bc')
+
+    def test_load(self):
+        self.record()
+        events = recording.load(self.path)
+        self.assertEqual([ms for ms, e in events],
+                         [67, 117, 117, 133])
+        self.assertEqual(events[2][1].type, pygame.MOUSEBUTTONDOWN)
+        self.assertEqual(events[2][1].pos, (10, 20))
+
+    def test_unknown_version(self):
+        with open(self.path, 'w') as f:
+            f.write('{"version": 99}\n')
+        self.assertRaises(ValueError, recording.load, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import pygame
+
+from pygameui import render
+
+
+STOPS = ((255, 0, 0), (0, 255, 0), (0, 0, 255))
+
+
+def pixels(surface):
+    w, h = surface.get_size()
+    return [tuple(surface.get_at((x, y))) for y in range(h) for x in range(w)]
+
+
+class GradientTest(unittest.TestCase):
+
+    def setUp(self):
+        render.clear_gradient_cache()
+
+    def tearDown(self):
+        render.clear_gradient_cache()
+
+    def check_fillrect(self, size, rect, vertical, forward=True, clip=None):
+        expected = pygame.Surface(size)
+        got = pygame.Surface(size)
+        if clip is not None:
+            expected.set_clip(clip)
+            got.set_clip(clip)
+        render.fill_gradient_stops(expected, STOPS, rect, vertical, forward)
+        render.fillrect(got, STOPS, rect, vertical, forward)
+        self.assertEqual(pixels(got), pixels(expected))
+
+    def test_fillrect_draws_the_gradient(self):
+        self.check_fillrect((90, 50), (0, 0, 90, 50), True)
+        self.check_fillrect((90, 50), (0, 0, 90, 50), False)
+        self.check_fillrect((90, 50), (5, 3, 70, 41), True, forward=False)
+
+    def test_fillrect_draws_only_inside_the_clip(self):
+        self.check_fillrect((90, 50), (0, 0, 90, 50), True,
+                            clip=(10, 20, 45, 7))
+        self.check_fillrect((90, 50), (0, 0, 90, 50), False,
+                            clip=(33, 0, 40, 50))
+
+    def test_strips_are_cached_by_length(self):
+        surface = pygame.Surface((200, 60))
+        render.fillrect(surface, STOPS, (0, 0, 200, 60))
+        render.fillrect(surface, STOPS, (10, 0, 100, 60))
+        info = render.gradient_cache_info()
+        self.assertEqual((info['misses'], info['hits']), (1, 1))
+
+        render.fillrect(surface, STOPS, (0, 0, 200, 30))
+        self.assertEqual(render.gradient_cache_info()['misses'], 2)
+
+    def test_least_recently_used_strips_are_dropped(self):
+        one = render.get_gradient_strip(STOPS, 100)
+        max_bytes = render.gradient_cache_max_bytes
+        render.gradient_cache_max_bytes = one.get_bytesize() * 32 * 250
+        try:
+            render.get_gradient_strip(STOPS, 101)
+            render.get_gradient_strip(STOPS, 100)     # used again
+            render.get_gradient_strip(STOPS, 102)
+            info = render.gradient_cache_info()
+            self.assertEqual(info['entries'], 2)
+            self.assertTrue(info['bytes'] <= info['max_bytes'])
+            self.assertTrue(render.get_gradient_strip(STOPS, 100) is one)
+        finally:
+            render.gradient_cache_max_bytes = max_bytes
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import pygameui
+from pygameui import resource, surfaces, textcache
+
+
+BLACK = (0, 0, 0)
+
+
+def setUpModule():
+    pygameui.init('test', (320, 240), headless=True)
+
+
+class TextCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        textcache.clear()
+        self.font = resource.get_font(16)
+
+    def tearDown(self):
+        textcache.clear()
+
+    def test_rendered_text_is_shared(self):
+        one = textcache.render(self.font, 'OK', True, BLACK)
+        self.assertTrue(textcache.render(self.font, 'OK', 1, BLACK) is one)
+        self.assertFalse(textcache.render(self.font, 'OK', True,
+                                          (255, 0, 0)) is one)
+        info = textcache.info()
+        self.assertEqual((info['hits'], info['misses']), (1, 2))
+        self.assertEqual(info['entries'], 2)
+
+    def test_shadowed_text_reuses_the_plain_text(self):
+        textcache.render_shadowed(self.font, 'OK', True, BLACK,
+                                  (255, 255, 255), (0, 1))
+        textcache.render(self.font, 'OK', True, BLACK)
+        info = textcache.info()
+        self.assertEqual((info['hits'], info['misses']), (1, 2))
+
+    def test_least_recently_used_text_is_dropped(self):
+        one = textcache.render(self.font, 'one', True, BLACK)
+        size = surfaces.surface_bytes(one)
+        max_bytes = textcache.max_bytes
+        textcache.max_bytes = size * 2
+        try:
+            two = textcache.render(self.font, 'one', True, (1, 1, 1))
+            textcache.render(self.font, 'one', True, BLACK)   # used again
+            textcache.render(self.font, 'one', True, (2, 2, 2))
+            info = textcache.info()
+            self.assertEqual(info['entries'], 2)
+            self.assertTrue(info['bytes'] <= info['max_bytes'])
+            self.assertTrue(textcache.render(self.font, 'one', True,
+                                             BLACK) is one)
+            self.assertFalse(textcache.render(self.font, 'one', True,
+                                              (1, 1, 1)) is two)
+        finally:
+            textcache.max_bytes = max_bytes
+
+    def test_clear(self):
+        textcache.render(self.font, 'OK', True, BLACK)
+        textcache.clear()
+        self.assertEqual(textcache.info(),
+                         dict(hits=0, misses=0, hit_rate=0.0, entries=0,
+                              bytes=0, max_bytes=textcache.max_bytes))
+
+
+if __name__ == '__main__':
+    unittest.main()
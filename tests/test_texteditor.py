@@ -0,0 +1,109 @@
+import random
+import unittest
+
+import pygame
+
+import pygameui
+from pygameui import scene
+from pygameui.texteditor import _Offsets
+
+
+WORDS = ['key', 'value', '=', 'localhost', '#', 'a' * 30, ' ']
+
+
+def setUpModule():
+    pygameui.init('test', (320, 240), headless=True)
+
+
+class OffsetsTest(unittest.TestCase):
+
+    def test_random_replacements(self):
+        rng = random.Random(2)
+        sizes = [rng.randint(1, 5) for _ in range(50)]
+        offsets = _Offsets(lambda index: sizes[index], lambda: len(sizes))
+        for _ in range(300):
+            first = rng.randint(0, len(sizes) - 1)
+            last = rng.randint(first, min(len(sizes) - 1, first + 3))
+            new = [rng.randint(1, 5) for _ in range(rng.randint(1, 4))]
+            start = offsets.get(first)
+            old_total = sum(sizes[first:last + 1])
+            sizes[first:last + 1] = new
+            entries = [start + sum(new[:i]) for i in range(1, len(new))]
+            offsets.replace(first, last, entries, sum(new) - old_total)
+
+            expected = [sum(sizes[:i]) for i in range(len(sizes))]
+            for index in rng.sample(range(len(sizes)), 5):
+                self.assertEqual(offsets.get(index), expected[index])
+                value = expected[index] + rng.randint(0, sizes[index] - 1)
+                self.assertEqual(offsets.find(value), index)
+        self.assertEqual([offsets.get(i) for i in range(len(sizes))],
+                         [sum(sizes[:i]) for i in range(len(sizes))])
+
+
+class TextEditorTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.rng = rng
+        text = '\n'.join(' '.join(rng.choice(WORDS)
+                                  for _ in range(rng.randint(0, 12)))
+                         for _ in range(200))
+        self.editor = pygameui.TextEditor(pygame.Rect(0, 0, 200, 0), text)
+        page = pygameui.Scene()
+        page.add_child(self.editor)
+        scene.push(page)
+
+    def tearDown(self):
+        scene.pop()
+
+    def check_layout(self, text):
+        editor = self.editor
+        self.assertEqual(editor.text, text)
+        paragraphs = text.split('\n')
+        spans = [editor._wrap_paragraph(p) for p in paragraphs]
+        self.assertEqual(editor._spans, spans)
+        self.assertEqual(editor.line_count, sum(len(s) for s in spans))
+        start = row = 0
+        for index, paragraph in enumerate(paragraphs):
+            self.assertEqual(editor.paragraph(index), paragraph)
+            self.assertEqual(editor._start(index), start)
+            self.assertEqual(editor._paragraph_at(start + len(paragraph)),
+                             index)
+            self.assertEqual(editor._first_row(index), row)
+            self.assertEqual(editor._paragraph_of_row(row), index)
+            start += len(paragraph) + 1
+            row += len(spans[index])
+
+    def test_edits_rewrap_only_what_changed(self):
+        editor, rng = self.editor, self.rng
+        text = editor.text
+        for _ in range(100):
+            editor.move_cursor(rng.randint(0, len(text)))
+            cursor = editor.cursor
+            if rng.random() < 0.6:
+                chars = rng.choice(['x', 'word ', '\n', 'a\nb'])
+                editor.insert(chars)
+                text = text[:cursor] + chars + text[cursor:]
+            elif cursor > 0:
+                editor.delete()
+                text = text[:cursor - 1] + text[cursor:]
+        self.check_layout(text)
+
+    def test_undo_and_redo(self):
+        editor = self.editor
+        original = editor.text
+        editor.move_cursor(10)
+        editor.insert('one')
+        editor.insert('\ntwo')
+        editor.delete()
+        edited = editor.text
+        for _ in range(3):
+            editor.undo()
+        self.check_layout(original)
+        for _ in range(3):
+            editor.redo()
+        self.check_layout(edited)
+
+
+if __name__ == '__main__':
+    unittest.main()
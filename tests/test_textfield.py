@@ -0,0 +1,133 @@
+import random
+import unittest
+
+import pygame
+
+import pygameui
+from pygameui import focus, glyphs, scene
+from pygameui.textfield import GapBuffer
+
+
+def setUpModule():
+    pygameui.init('test', (320, 240), headless=True)
+
+
+def pixels(surface):
+    return surface.get_size(), pygame.image.tostring(surface, 'RGBA')
+
+
+class GapBufferTest(unittest.TestCase):
+
+    def test_edits_at_the_cursor(self):
+        buf = GapBuffer('hello')
+        self.assertEqual((buf.text, buf.cursor), ('hello', 5))
+        buf.move_to(2)
+        buf.insert('yy')
+        self.assertEqual((buf.text, buf.cursor), ('heyyllo', 4))
+        buf.delete_before()
+        buf.delete_after(2)
+        self.assertEqual((buf.text, buf.cursor), ('heyo', 3))
+        buf.move_to(99)
+        buf.delete_after()
+        buf.delete_before(10)
+        self.assertEqual((buf.text, buf.cursor, len(buf)), ('', 0, 0))
+
+    def test_characters_on_both_sides_of_the_cursor(self):
+        buf = GapBuffer('abcdef')
+        buf.move_to(2)
+        self.assertEqual([buf[i] for i in range(len(buf))], list('abcdef'))
+        self.assertEqual(buf[-1], 'f')
+
+    def test_random_edits(self):
+        rng = random.Random(3)
+        buf = GapBuffer()
+        text = ''
+        for _ in range(500):
+            position = rng.randint(-2, len(text) + 2)
+            buf.move_to(position)
+            position = max(0, min(len(text), position))
+            op = rng.choice('ibd')
+            if op == 'i':
+                chars = rng.choice(['', 'x', 'yz', 'abc'])
+                buf.insert(chars)
+                text = text[:position] + chars + text[position:]
+            elif op == 'b':
+                count = rng.randint(0, 3)
+                buf.delete_before(count)
+                text = text[:max(0, position - count)] + text[position:]
+            else:
+                count = rng.randint(0, 3)
+                buf.delete_after(count)
+                text = text[:position] + text[position + count:]
+            self.assertEqual(buf.text, text)
+            self.assertEqual(len(buf), len(text))
+
+
+class TextFieldTest(unittest.TestCase):
+
+    def setUp(self):
+        focus.set(None)
+        self.field = pygameui.TextField(pygame.Rect(20, 20, 120, 40),
+                                        placeholder='Name')
+        page = pygameui.Scene()
+        page.add_child(self.field)
+        scene.push(page)
+        pygameui.step(1)
+        focus.set(self.field)
+        pygameui.step(1)
+
+    def tearDown(self):
+        focus.set(None)
+        scene.pop()
+
+    def check_shown(self, shown):
+        field = self.field
+        line = field.label._line
+        self.assertEqual(line.text, shown)
+        atlas = glyphs.get_atlas(field.label.font, True,
+                                 field.label.text_color)
+        self.assertEqual(pixels(line.text_surface),
+                         pixels(atlas.render(shown)))
+        for i in range(len(shown)):
+            self.assertEqual(field._cursor_x(i), line.starts[i])
+
+    def test_edits_show_the_same_text_as_a_full_render(self):
+        field = self.field
+        rng = random.Random(5)
+        text = ''
+        for _ in range(60):
+            field.move_cursor(rng.randint(0, len(text)))
+            if rng.random() < 0.3:
+                field.move_cursor(rng.randint(0, len(text)), select=True)
+            start, end = field.selection or (field.cursor, field.cursor)
+            if rng.random() < 0.6:
+                chars = rng.choice(['W', 'il', 'fox ', '.'])
+                field.insert(chars)
+                text = text[:start] + chars + text[end:]
+            elif start < end or start > 0:
+                field.delete()
+                start = start if start < end else start - 1
+                text = text[:start] + text[end:]
+            self.assertEqual(field.text, text)
+        self.check_shown(text)
+
+    def test_secure_text_is_hidden(self):
+        field = self.field
+        field.secure = True
+        field.text = 'secret'
+        field.move_cursor(3)
+        field.insert('ive')
+        self.assertEqual(field.text, 'seciveret')
+        self.check_shown('*' * 9)
+
+    def test_text_change_signal(self):
+        changes = []
+        self.field.on_text_change.connect(
+            lambda field, text: changes.append(text))
+        self.field.insert('ab')
+        self.field.delete()
+        self.assertEqual(changes, ['ab', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
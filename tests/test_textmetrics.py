@@ -0,0 +1,91 @@
+import unittest
+
+import pygameui
+from pygameui import resource, textmetrics
+
+
+TEXT = ('The quick brown fox jumps over the lazy dog.\n'
+        'Pack my box with five dozen liquor jugs.')
+
+
+def setUpModule():
+    pygameui.init('test', (320, 240), headless=True)
+
+
+class CountingFont(object):
+    """Counts the sizes asked of a real font."""
+
+    def __init__(self, font):
+        self.font = font
+        self.calls = 0
+
+    def size(self, text):
+        self.calls += 1
+        return self.font.size(text)
+
+
+class TextMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        textmetrics.clear()
+        self.font = resource.get_font(16)
+
+    def tearDown(self):
+        textmetrics.clear()
+
+    def test_sizes_are_measured_once(self):
+        font = CountingFont(self.font)
+        self.assertEqual(textmetrics.size(font, 'hello'),
+                         self.font.size('hello'))
+        textmetrics.size(font, 'hello')
+        self.assertEqual(font.calls, 1)
+
+    def test_least_recently_used_sizes_are_dropped(self):
+        font = CountingFont(self.font)
+        max_cached_sizes = textmetrics.max_cached_sizes
+        textmetrics.max_cached_sizes = 4
+        try:
+            for text in 'abcd':
+                textmetrics.size(font, text)
+            textmetrics.size(font, 'a')     # used again
+            textmetrics.size(font, 'e')     # drops 'b'
+            font.calls = 0
+            for text in 'acde':
+                textmetrics.size(font, text)
+            self.assertEqual(font.calls, 0)
+            textmetrics.size(font, 'b')
+            self.assertEqual(font.calls, 1)
+        finally:
+            textmetrics.max_cached_sizes = max_cached_sizes
+
+    def test_advances_add_up_to_the_width(self):
+        text = 'AVATAR'
+        x = sum(textmetrics.advance(self.font, a, b)
+                for a, b in zip(text, text[1:]))
+        self.assertEqual(x + self.font.size(text[-1])[0],
+                         self.font.size(text)[0])
+
+    def test_clipped_text_is_one_line(self):
+        lines, size = textmetrics.measure(self.font, ' a\n\nb ')
+        self.assertEqual(lines, ['a b'])
+        self.assertEqual(size, self.font.size('a b'))
+        self.assertEqual(textmetrics.measure(self.font, ''), ([], (0, 0)))
+
+    def test_wrapped_lines_fit(self):
+        width = 150
+        lines, (w, h) = textmetrics.measure(self.font, TEXT, width,
+                                            textmetrics.WORD_WRAP)
+        self.assertTrue(len(lines) > 2)
+        self.assertEqual(' '.join(lines).split(), TEXT.split())
+        for line in lines:
+            self.assertTrue(self.font.size(line)[0] < width)
+        self.assertEqual(w, max(self.font.size(line)[0] for line in lines))
+        self.assertEqual(h, sum(self.font.size(line)[1] for line in lines))
+
+        spans = textmetrics.line_spans(self.font, TEXT, width)
+        self.assertEqual([TEXT[start:end].strip() for start, end in spans],
+                         lines)
+
+
+if __name__ == '__main__':
+    unittest.main()